@@ -0,0 +1,197 @@
+"""
+Auditoría masiva de geocercas sobre asistencias históricas.
+
+Lee en bloque FECHA / PROVEEDOR / ZONA / TIPO / LATITUD / LONGITUD de las hojas de
+asistencia (un solo batchGet por archivo), valida todos los puntos contra las zonas
+de forma vectorizada y genera un resumen de cumplimiento por zona, proveedor y tipo.
+
+Uso como CLI:
+    python auditoria.py --ssid <ID_ASISTENCIA> --ssid <ID_ORDENAMIENTO> \
+        [--desde 2025-01-01] [--hasta 2025-01-31] [--salida auditoria.csv]
+(requiere GOOGLE_CREDENTIALS_JSON en el entorno)
+"""
+import os
+import sys
+import json
+import argparse
+import logging
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from zonas import IndiceZonas, cargar_indice_zonas, normalizar_nombre_zona
+
+logger = logging.getLogger(__name__)
+
+SHEET_TITLE = "Registros"
+
+# Columnas por defecto (mismo mapa que COL en main.py)
+COLUMNAS_AUDITORIA = {
+    "FECHA": "C",
+    "PROVEEDOR": "F",
+    "ZONA": "G",
+    "TIPO DE CUADRILLA": "H",
+    "LATITUD": "J",
+    "LONGITUD": "K",
+}
+
+DENTRO, FUERA, SIN_MAPA, SIN_UBICACION = "DENTRO", "FUERA", "SIN MAPA", "SIN UBICACION"
+
+# Los seriales de fecha de Google Sheets cuentan días desde 1899-12-30
+EPOCA_SHEETS = date(1899, 12, 30)
+
+
+def _a_fecha(valor):
+    if valor in (None, ""):
+        return None
+    if isinstance(valor, (int, float)):
+        return EPOCA_SHEETS + timedelta(days=int(valor))
+    texto = str(valor).strip()
+    for formato in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _a_float(valor):
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    try:
+        return float(str(valor).strip().replace(",", "."))
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def leer_columnas(sheets_service, spreadsheet_id: str, columnas: dict,
+                  sheet_title: str = SHEET_TITLE, desde_fila: int = 2, hasta_fila: int = None) -> pd.DataFrame:
+    """
+    Trae las columnas {NOMBRE: letra} (filas `desde_fila`..`hasta_fila`, por defecto
+    de la 2 al final) con un único values().batchGet, sin convertir: fechas y horas
+    llegan como seriales de Sheets o como texto.
+    """
+    nombres = list(columnas.keys())
+    hasta = "" if hasta_fila is None else hasta_fila
+    resp = sheets_service.spreadsheets().values().batchGet(
+        spreadsheetId=spreadsheet_id,
+        ranges=[f"{sheet_title}!{columnas[n]}{desde_fila}:{columnas[n]}{hasta}" for n in nombres],
+        majorDimension="COLUMNS",
+        valueRenderOption="UNFORMATTED_VALUE",
+        dateTimeRenderOption="SERIAL_NUMBER",
+    ).execute()
+
+    valores = []
+    for rango in resp.get("valueRanges", []):
+        filas = rango.get("values", [])
+        valores.append(filas[0] if filas else [])
+
+    total = max((len(v) for v in valores), default=0)
+    datos = {n: v + [""] * (total - len(v)) for n, v in zip(nombres, valores)}
+    return pd.DataFrame(datos, columns=nombres)
+
+
+def leer_asistencias(sheets_service, spreadsheet_id: str, columnas: dict = None,
+                     sheet_title: str = SHEET_TITLE) -> pd.DataFrame:
+    """Trae las columnas de auditoría de una hoja con un único values().batchGet."""
+    df = leer_columnas(sheets_service, spreadsheet_id, columnas or COLUMNAS_AUDITORIA, sheet_title)
+
+    df["FECHA"] = df["FECHA"].map(_a_fecha)
+    df["LATITUD"] = df["LATITUD"].map(_a_float).astype(float)
+    df["LONGITUD"] = df["LONGITUD"].map(_a_float).astype(float)
+    for c in ("PROVEEDOR", "ZONA", "TIPO DE CUADRILLA"):
+        df[c] = df[c].astype(str).str.strip()
+    return df
+
+
+def auditar(df: pd.DataFrame, indice: IndiceZonas) -> pd.DataFrame:
+    """
+    Agrega la columna ESTADO (DENTRO / FUERA / SIN MAPA / SIN UBICACION).
+    La validación punto-en-polígono se hace en bloque: una llamada vectorizada por zona.
+    """
+    df = df.copy()
+    estado = np.full(len(df), SIN_MAPA, dtype=object)
+
+    lats = df["LATITUD"].to_numpy(dtype=float)
+    lons = df["LONGITUD"].to_numpy(dtype=float)
+    con_ubicacion = ~(np.isnan(lats) | np.isnan(lons))
+    estado[~con_ubicacion] = SIN_UBICACION
+
+    zonas_norm = df["ZONA"].map(normalizar_nombre_zona).to_numpy()
+    for zona in pd.unique(zonas_norm[con_ubicacion]):
+        filas = np.flatnonzero(con_ubicacion & (zonas_norm == zona))
+        dentro = indice.contiene_xy(zona, lats[filas], lons[filas])
+        if dentro is None:
+            continue
+        estado[filas] = np.where(dentro, DENTRO, FUERA)
+
+    df["ESTADO"] = estado
+    return df
+
+
+def resumen_cumplimiento(df: pd.DataFrame) -> pd.DataFrame:
+    """Cumplimiento por ZONA, PROVEEDOR y TIPO DE CUADRILLA."""
+    conteo = pd.crosstab(
+        [df["ZONA"], df["PROVEEDOR"], df["TIPO DE CUADRILLA"]], df["ESTADO"]
+    )
+    for c in (DENTRO, FUERA, SIN_MAPA, SIN_UBICACION):
+        if c not in conteo.columns:
+            conteo[c] = 0
+    conteo = conteo[[DENTRO, FUERA, SIN_MAPA, SIN_UBICACION]]
+    conteo["TOTAL"] = conteo.sum(axis=1)
+    validados = conteo[DENTRO] + conteo[FUERA]
+    conteo["% CUMPLIMIENTO"] = (100 * conteo[DENTRO] / validados.where(validados > 0)).round(1)
+    return conteo.reset_index().sort_values(["ZONA", "PROVEEDOR", "TIPO DE CUADRILLA"])
+
+
+def auditar_hojas(sheets_service, spreadsheet_ids, indice: IndiceZonas,
+                  desde: date | None = None, hasta: date | None = None,
+                  columnas: dict = None) -> pd.DataFrame:
+    """Lee todas las hojas, filtra por fechas y devuelve el resumen de cumplimiento."""
+    marcos = [leer_asistencias(sheets_service, ssid, columnas) for ssid in spreadsheet_ids if ssid]
+    df = pd.concat(marcos, ignore_index=True) if marcos else pd.DataFrame(columns=list(COLUMNAS_AUDITORIA))
+    if desde:
+        df = df[df["FECHA"].map(lambda f: f is not None and f >= desde)]
+    if hasta:
+        df = df[df["FECHA"].map(lambda f: f is not None and f <= hasta)]
+
+    auditado = auditar(df, indice)
+    logger.info(
+        f"[AUDITORIA] {len(auditado)} filas | "
+        + " | ".join(f"{k}: {v}" for k, v in auditado["ESTADO"].value_counts().items())
+    )
+    return resumen_cumplimiento(auditado)
+
+
+def _servicio_sheets():
+    from google.oauth2 import service_account
+    from googleapiclient.discovery import build
+
+    creds = service_account.Credentials.from_service_account_info(
+        json.loads(os.environ["GOOGLE_CREDENTIALS_JSON"]),
+        scopes=["https://www.googleapis.com/auth/spreadsheets.readonly"],
+    )
+    return build("sheets", "v4", credentials=creds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Auditoría masiva de geocercas")
+    parser.add_argument("--ssid", action="append", required=True, help="ID de hoja de asistencia (repetible)")
+    parser.add_argument("--desde", type=date.fromisoformat)
+    parser.add_argument("--hasta", type=date.fromisoformat)
+    parser.add_argument("--geojson", default="zonas.geojson")
+    parser.add_argument("--salida", default="auditoria_geocercas.csv")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    resumen = auditar_hojas(_servicio_sheets(), args.ssid, cargar_indice_zonas(args.geojson),
+                            args.desde, args.hasta)
+    resumen.to_csv(args.salida, index=False, encoding="utf-8-sig")
+    print(resumen.to_string(index=False))
+    print(f"\n🧾 Reporte guardado en {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Tiempo de arranque en frío: cuánto tarda `import main` + `construir_app()` y qué
+módulos pesan, medido con `python -X importtime` en un proceso nuevo.
+
+El arranque no debe tocar la red: las credenciales de Google son inválidas a
+propósito (si algo llama a Google al importar, la medición falla) y el Bot API
+es el doble de benchmarks/falsos.py. Sale con código 1 si se pasa del
+presupuesto o si algún módulo pesado que debería cargarse recién al usarse
+(pandas, Pillow, shapely, googleapiclient…) ya se importó al arrancar.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.arranque [--presupuesto-ms 1500] [--top 25] \
+        [--reporte benchmarks/importtime.md]
+
+El reporte versionado (benchmarks/importtime.md) se regenera cuando cambian
+los imports de main.py, en el mismo commit.
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+from datetime import date
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sólo se importan en el camino que los usa (auditoría, selfies, mapa de zonas,
+# primera llamada a Google, servidor HTTP de webhook / métricas)
+DIFERIDOS = (
+    "pandas", "openpyxl", "PIL", "numpy", "shapely",
+    "googleapiclient", "google.oauth2", "requests", "aiohttp",
+)
+
+PRESUPUESTO_MS = 1000
+
+_SCRIPT = r"""
+import os, sys, json, time, tempfile
+sys.path.insert(0, {raiz!r})
+
+tmp = tempfile.mkdtemp(prefix="arranque_")
+os.environ.setdefault("BOT_TOKEN", "123456:ARRANQUE")
+os.environ["GEOCACHE_DB"] = os.path.join(tmp, "geocache.sqlite3")
+os.environ["TRABAJO_DIFERIDO_PATH"] = os.path.join(tmp, "trabajo_diferido.json")
+os.environ["TRAZAS_PATH"] = ""
+os.environ["GOOGLE_CREDENTIALS_JSON"] = "{{}}"
+antes = set(sys.modules)
+
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+cargados = sorted(set(sys.modules) - antes)
+
+from benchmarks.falsos import TelegramFalso
+t2 = time.perf_counter()
+app = main.construir_app(request=TelegramFalso())
+t3 = time.perf_counter()
+
+print("@@" + json.dumps({{
+    "import_main_ms": (t1 - t0) * 1000,
+    "construir_app_ms": (t3 - t2) * 1000,
+    "modulos": cargados,
+}}))
+"""
+
+_LINEA = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def _medir_una_vez() -> tuple:
+    """(resultado del proceso hijo, [(modulo, propio_us, acumulado_us, nivel)])"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _SCRIPT.format(raiz=RAIZ)],
+        cwd=RAIZ, capture_output=True, text=True, timeout=300,
+    )
+    salida = next((l[2:] for l in proc.stdout.splitlines() if l.startswith("@@")), None)
+    if proc.returncode != 0 or salida is None:
+        raise RuntimeError(f"El proceso de medición falló:\n{proc.stderr[-3000:]}")
+
+    modulos = []
+    for linea in proc.stderr.splitlines():
+        m = _LINEA.match(linea)
+        if m:
+            propio, acumulado, sangria, nombre = m.groups()
+            modulos.append((nombre, int(propio), int(acumulado), len(sangria) // 2))
+    return json.loads(salida), modulos
+
+
+def medir(repeticiones: int = 3) -> dict:
+    """La primera corrida compila .pyc; se reporta la mediana de las siguientes."""
+    _medir_una_vez()
+    corridas = [_medir_una_vez() for _ in range(repeticiones)]
+    resultado, modulos = corridas[len(corridas) // 2]
+    return {
+        "import_main_ms": round(statistics.median(c[0]["import_main_ms"] for c in corridas), 1),
+        "construir_app_ms": round(statistics.median(c[0]["construir_app_ms"] for c in corridas), 1),
+        "cargados": resultado["modulos"],
+        "importtime": modulos,
+    }
+
+
+def imports_de_main(importtime: list) -> list:
+    """
+    [(módulo, acumulado_ms)] de lo que importa main.py directamente, del más caro
+    al más barato. -X importtime lista los hijos antes que el padre, así que son
+    los de nivel 1 entre el import de primer nivel anterior y `main`.
+    """
+    hijos = []
+    for nombre, _, acumulado, nivel in importtime:
+        if nivel == 0:
+            if nombre == "main":
+                return sorted(hijos, key=lambda x: -x[1])
+            hijos = []
+        elif nivel == 1:
+            hijos.append((nombre, acumulado / 1000))
+    return []
+
+
+def diferidos_cargados(cargados: list) -> list:
+    return [d for d in DIFERIDOS if d in cargados]
+
+
+def reporte_markdown(r: dict, top: int, presupuesto_ms: float) -> str:
+    total = r["import_main_ms"] + r["construir_app_ms"]
+    lineas = [
+        "# Tiempo de importación al arrancar",
+        "",
+        f"Generado con `python -m benchmarks.arranque --reporte benchmarks/importtime.md` "
+        f"({date.today().isoformat()}, Python {sys.version.split()[0]}).",
+        "",
+        f"- `import main`: **{r['import_main_ms']:.0f} ms**",
+        f"- `construir_app()`: **{r['construir_app_ms']:.0f} ms**",
+        f"- Total: **{total:.0f} ms** (presupuesto {presupuesto_ms:.0f} ms)",
+        f"- Diferidos cargados al arrancar: {', '.join(diferidos_cargados(r['cargados'])) or 'ninguno'}",
+        "",
+        f"## Imports de main.py más caros (top {top})",
+        "",
+        "| módulo | acumulado (ms) |",
+        "|---|---:|",
+    ]
+    for nombre, ms in imports_de_main(r["importtime"])[:top]:
+        lineas.append(f"| `{nombre}` | {ms:.1f} |")
+    return "\n".join(lineas) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Presupuesto de arranque en frío")
+    parser.add_argument("--presupuesto-ms", type=float, default=PRESUPUESTO_MS)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--reporte", help="escribir el reporte en Markdown en este archivo")
+    args = parser.parse_args(argv)
+
+    r = medir(args.repeticiones)
+    total = r["import_main_ms"] + r["construir_app_ms"]
+    diferidos = diferidos_cargados(r["cargados"])
+
+    print(f"\n⏱️  import main {r['import_main_ms']:.0f} ms + construir_app {r['construir_app_ms']:.0f} ms "
+          f"= {total:.0f} ms (presupuesto {args.presupuesto_ms:.0f} ms)\n")
+    for nombre, ms in imports_de_main(r["importtime"])[:args.top]:
+        print(f"  {nombre:<40} {ms:>8.1f} ms")
+
+    if args.reporte:
+        with open(args.reporte, "w", encoding="utf-8") as f:
+            f.write(reporte_markdown(r, args.top, args.presupuesto_ms))
+        print(f"\n📝 Reporte en {args.reporte}")
+
+    falla = False
+    if total > args.presupuesto_ms:
+        falla = True
+        print(f"\n❌ Arranque fuera de presupuesto: {total:.0f} ms > {args.presupuesto_ms:.0f} ms")
+    if diferidos:
+        falla = True
+        print(f"\n❌ Se importan al arrancar módulos que deberían ser diferidos: {', '.join(diferidos)}")
+    if not falla:
+        print("\n✅ Arranque dentro de presupuesto")
+    return 1 if falla else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Benchmark de codificadores de selfies.
+
+Pasa cada imagen de una carpeta por todos los codificadores disponibles y reporta
+tiempo de codificación, tamaño de salida y SSIM contra la imagen original.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_codecs carpeta_selfies/ [--repeticiones 5] [--csv salida.csv]
+"""
+import argparse
+import csv
+import io
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from imagenes import CODIFICADORES  # noqa: E402
+
+EXTENSIONES = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def _filtro_caja(a: np.ndarray, k: int) -> np.ndarray:
+    """Media móvil k×k con imagen integral (sin scipy)."""
+    c = np.cumsum(np.cumsum(np.pad(a, ((1, 0), (1, 0))), axis=0), axis=1)
+    return (c[k:, k:] - c[:-k, k:] - c[k:, :-k] + c[:-k, :-k]) / (k * k)
+
+
+def ssim(a: np.ndarray, b: np.ndarray, k: int = 8) -> float:
+    """SSIM en escala de grises con ventanas uniformes k×k."""
+    a = a.astype(np.float64)
+    b = b.astype(np.float64)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+
+    mu_a, mu_b = _filtro_caja(a, k), _filtro_caja(b, k)
+    var_a = _filtro_caja(a * a, k) - mu_a ** 2
+    var_b = _filtro_caja(b * b, k) - mu_b ** 2
+    cov = _filtro_caja(a * b, k) - mu_a * mu_b
+
+    mapa = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(mapa.mean())
+
+
+def _gris(datos: bytes) -> np.ndarray:
+    with Image.open(io.BytesIO(datos)) as img:
+        return np.asarray(img.convert("L"))
+
+
+def medir(codificador, datos: bytes, repeticiones: int) -> dict:
+    tiempos = []
+    salida = b""
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        salida = codificador.codificar(io.BytesIO(datos)).getvalue()
+        tiempos.append(time.perf_counter() - t0)
+
+    return {
+        "ms": statistics.median(tiempos) * 1000,
+        "bytes": len(salida),
+        "ssim": ssim(_gris(datos), _gris(salida)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de codificadores de imagen")
+    parser.add_argument("carpeta", help="Carpeta con selfies de muestra")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--csv", help="Ruta opcional para guardar resultados por imagen")
+    args = parser.parse_args(argv)
+
+    archivos = sorted(
+        os.path.join(args.carpeta, f) for f in os.listdir(args.carpeta)
+        if f.lower().endswith(EXTENSIONES)
+    )
+    if not archivos:
+        print(f"❌ No hay imágenes en {args.carpeta}")
+        return 1
+
+    codificadores = []
+    for nombre, clase in CODIFICADORES.items():
+        cod = clase()
+        if cod.disponible():
+            codificadores.append(cod)
+        else:
+            print(f"⚠️ {nombre}: no disponible, se omite")
+
+    filas = []
+    for ruta in archivos:
+        with open(ruta, "rb") as f:
+            datos = f.read()
+        for cod in codificadores:
+            r = medir(cod, datos, args.repeticiones)
+            filas.append({"archivo": os.path.basename(ruta), "codificador": cod.nombre,
+                          "bytes_entrada": len(datos), **r})
+
+    print(f"\n{len(archivos)} imágenes, {args.repeticiones} repeticiones\n")
+    print(f"{'codificador':<12}{'ms (p50)':>10}{'ms (p95)':>10}{'KB prom':>10}{'ratio':>8}{'SSIM':>8}")
+    for cod in codificadores:
+        propias = [f for f in filas if f["codificador"] == cod.nombre]
+        ms = sorted(f["ms"] for f in propias)
+        p95 = ms[min(len(ms) - 1, int(round(0.95 * (len(ms) - 1))))]
+        kb = statistics.mean(f["bytes"] for f in propias) / 1024
+        ratio = sum(f["bytes"] for f in propias) / sum(f["bytes_entrada"] for f in propias)
+        print(f"{cod.nombre:<12}{statistics.median(ms):>10.1f}{p95:>10.1f}{kb:>10.1f}"
+              f"{ratio:>8.2f}{statistics.mean(f['ssim'] for f in propias):>8.4f}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(filas[0].keys()))
+            w.writeheader()
+            w.writerows(filas)
+        print(f"\n🧾 Detalle guardado en {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
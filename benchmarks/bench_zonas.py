@@ -0,0 +1,82 @@
+"""
+Micro-benchmark de validación de zona.
+
+Compara el chequeo histórico (`poligono.contains(Point(...))` sobre el polígono crudo)
+contra el índice de zonas (caja + geometría preparada) y la vía vectorizada `contiene_xy`.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_zonas [--zona "LIMA - ESTE 4"] [--puntos 20000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from shapely.geometry import Point
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zonas import IndiceZonas, cargar_poligonos_geojson  # noqa: E402
+
+
+def _puntos(bounds, n, semilla=7, margen=1.0):
+    """Puntos al azar en la caja de `bounds` agrandada `margen` veces hacia cada lado."""
+    rng = np.random.default_rng(semilla)
+    minx, miny = bounds[:, 0].min(), bounds[:, 1].min()
+    maxx, maxy = bounds[:, 2].max(), bounds[:, 3].max()
+    dx, dy = (maxx - minx) * margen, (maxy - miny) * margen
+    lons = rng.uniform(minx - dx, maxx + dx, n)
+    lats = rng.uniform(miny - dy, maxy + dy, n)
+    return lats, lons
+
+
+def _cronometrar(fn):
+    t0 = time.perf_counter()
+    r = fn()
+    return time.perf_counter() - t0, r
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de validación de zonas")
+    parser.add_argument("--geojson", default="zonas.geojson")
+    parser.add_argument("--zona", default="LIMA - ESTE 4")
+    parser.add_argument("--puntos", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    t_carga, crudas = _cronometrar(lambda: cargar_poligonos_geojson(args.geojson))
+    t_indice, indice = _cronometrar(lambda: IndiceZonas(crudas))
+    poligono = crudas[args.zona.strip().upper()]
+    print(f"Zonas: {len(indice)} | Zona: {args.zona} | Puntos: {args.puntos}")
+    print(f"Carga GeoJSON: {t_carga * 1000:.1f} ms | Construcción índice: {t_indice * 1000:.1f} ms")
+
+    # Todo el mapa (la mayoría de los puntos cae fuera de la caja de la zona) y
+    # sólo la caja de la zona (siempre se llega al punto-en-polígono)
+    i = indice.indice(args.zona)
+    escenarios = (
+        ("todo el mapa", _puntos(indice.bounds, args.puntos)),
+        ("caja de la zona", _puntos(indice.bounds[i:i + 1], args.puntos, margen=0.0)),
+    )
+    for titulo, (lats, lons) in escenarios:
+        n = len(lats)
+        t_crudo, r_crudo = _cronometrar(
+            lambda: [poligono.contains(Point(lon, lat)) for lat, lon in zip(lats, lons)]
+        )
+        t_indice_pt, r_indice = _cronometrar(
+            lambda: [indice.contiene(args.zona, lat, lon) for lat, lon in zip(lats, lons)]
+        )
+        t_vector, r_vector = _cronometrar(lambda: indice.contiene_xy(args.zona, lats, lons))
+
+        assert r_crudo == r_indice == r_vector.tolist(), "Los resultados no coinciden"
+
+        print(f"\n[{titulo}] Dentro: {int(r_vector.sum())} de {n}")
+        print(f"{'método':<28}{'µs/punto':>10}{'aceleración':>14}")
+        for nombre, t in (("contains(Point) crudo", t_crudo),
+                          ("IndiceZonas.contiene", t_indice_pt),
+                          ("IndiceZonas.contiene_xy", t_vector)):
+            print(f"{nombre:<28}{t / n * 1e6:>10.2f}{t_crudo / t:>13.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
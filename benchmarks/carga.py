@@ -0,0 +1,334 @@
+"""
+Prueba de carga de punta a punta con backends falsos en proceso.
+
+Simula N técnicos recorriendo el flujo completo contra los handlers reales de main.py
+(/ingreso → ID Phoenix → confirmar → tipo → confirmar tipo → selfie → confirmar →
+ubicación en vivo → /salida → selfie → confirmar → ubicación) y mide, por paso,
+cuánto tarda en llegar la respuesta del bot al chat. Telegram, Sheets, Drive y
+Geocoding son dobles de benchmarks/falsos.py con latencia y fallos configurables.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.carga --tecnicos 50 [--rampa 10] [--lat-sheets 150] \
+        [--lat-drive 400] [--lat-telegram 60] [--lat-geocoding 200] \
+        [--error-sheets 0.01] [--tasa-429 0.02] [--json reporte.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+import tempfile
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.falsos import (  # noqa: E402
+    Latencia,
+    SheetsFalso,
+    DriveFalso,
+    GeocodingFalso,
+    TelegramFalso,
+    instalar_google_falso,
+)
+
+NOMBRE_CUADRILLAS = "CUADRILLAS ACTIVAS"
+NOMBRE_ASISTENCIA = "ASISTENCIA_CUADRILLAS_DISP_ALTO_VALOR"
+NOMBRE_ORDENAMIENTO = "ASISTENCIA_ORDENAMIENTO"
+CHAT_BASE = 900_000_000
+
+# (nombre del paso, tipo de entrada, dato, paso esperado tras procesarlo)
+FLUJO_TECNICO = [
+    ("ingreso", "comando", "/ingreso", "esperando_cuadrilla"),
+    ("id_phoenix", "texto", None, "confirmar_nombre"),
+    ("confirmar_nombre", "boton", "confirmar_nombre", "tipo"),
+    ("tipo", "boton", None, "confirmar_tipo"),
+    ("confirmar_tipo", "boton", "confirmar_tipo", "esperando_selfie_inicio"),
+    ("selfie_inicio", "foto", None, "confirmar_selfie_inicio"),
+    ("confirmar_selfie_inicio", "boton", "confirmar_selfie_inicio", "esperando_live_inicio"),
+    ("ubicacion_inicio", "ubicacion", None, "en_jornada"),
+    ("salida", "comando", "/salida", "esperando_selfie_salida"),
+    ("selfie_salida", "foto", None, "confirmar_selfie_salida"),
+    ("confirmar_selfie_salida", "boton", "confirmar_selfie_salida", "esperando_live_salida"),
+    ("ubicacion_salida", "ubicacion", None, "finalizado"),
+]
+
+
+def percentil(muestras: list, p: float) -> float:
+    if not muestras:
+        return 0.0
+    ordenadas = sorted(muestras)
+    return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+
+class Entorno:
+    """Dobles + módulo main importado sobre ellos + Application de PTB."""
+
+    def __init__(self, args):
+        self.args = args
+        self.sheets = SheetsFalso(Latencia(args.lat_sheets, args.lat_sheets / 3, args.error_sheets, semilla=1))
+        self.drive = DriveFalso(
+            Latencia(args.lat_drive, args.lat_drive / 3, args.error_drive, semilla=2),
+            archivos={
+                NOMBRE_CUADRILLAS: "ssid_cuadrillas",
+                NOMBRE_ASISTENCIA: "ssid_asistencia",
+                NOMBRE_ORDENAMIENTO: "ssid_ordenamiento",
+                "IMAGENES": "carpeta_imagenes",
+            },
+        )
+        self.geocoding = GeocodingFalso(Latencia(args.lat_geocoding, args.lat_geocoding / 3, args.error_geocoding, semilla=3))
+        self.telegram = TelegramFalso(Latencia(args.lat_telegram, args.lat_telegram / 3, 0.0, semilla=4),
+                                      tasa_429=args.tasa_429)
+        self.main = None
+        self.app = None
+
+    def preparar(self):
+        # Cuadrillas activas: código en A, cuadrilla en B, proveedor en L, zona en W
+        filas = self.sheets.hoja("ssid_cuadrillas")
+        for i in range(1, self.args.tecnicos + 1):
+            fila = [""] * 23
+            fila[0], fila[1], fila[11], fila[22] = str(i), f"CUADRILLA {i}", f"PROVEEDOR {i % 5}", "ZONA SIN MAPA"
+            filas.append(fila)
+
+        instalar_google_falso(self.drive, self.sheets)
+        tmp = tempfile.mkdtemp(prefix="carga_")
+        os.environ.setdefault("BOT_TOKEN", "123456:CARGA")
+        os.environ["GEOCACHE_DB"] = os.path.join(tmp, "geocache.sqlite3")
+        os.environ["TRABAJO_DIFERIDO_PATH"] = os.path.join(tmp, "trabajo_diferido.json")
+        os.environ.setdefault("TRAZAS_PATH", os.path.join(tmp, "trazas.jsonl"))
+
+        import main  # noqa: E402  (importa sobre los dobles ya instalados)
+
+        main.GEOCODING_CLIENT = self.geocoding
+        # Los técnicos simulados no dependen del horario laboral ni del registro diario
+        main.USUARIOS_TEST.update(CHAT_BASE + i for i in range(self.args.tecnicos))
+        self.main = main
+        self.app = main.construir_app(request=self.telegram)
+
+    async def iniciar(self):
+        await self.app.initialize()
+        await self.app.start()
+
+    async def detener(self):
+        await self.app.stop()
+        await self.app.shutdown()
+
+
+class Tecnico:
+    def __init__(self, entorno: Entorno, n: int, resultados: dict, tipo: str, vivos: int, timeout: float,
+                 pausa: float = 0.0):
+        self.e = entorno
+        self.n = n
+        self.chat_id = CHAT_BASE + n
+        self.resultados = resultados
+        self.tipo = tipo
+        self.vivos = vivos
+        self.timeout = timeout
+        self.pausa = pausa
+        self.ultimo_mensaje = None
+        self._update_id = n * 1000
+        self._rng = random.Random(n)
+        self.lat = -12.12 + self._rng.uniform(-0.05, 0.05)
+        self.lon = -77.03 + self._rng.uniform(-0.05, 0.05)
+
+    # ---------- construcción de updates ----------
+
+    def _base_mensaje(self) -> dict:
+        self._update_id += 1
+        return {
+            "message_id": self._update_id,
+            "date": int(time.time()),
+            "chat": {"id": self.chat_id, "type": "private", "first_name": f"Tecnico {self.n}"},
+            "from": {"id": self.chat_id, "is_bot": False, "first_name": f"Tecnico {self.n}"},
+        }
+
+    def _update(self, tipo: str, dato) -> dict:
+        if tipo == "boton":
+            self._update_id += 1
+            return {"update_id": self._update_id, "callback_query": {
+                "id": f"{self.chat_id}-{self._update_id}",
+                "from": {"id": self.chat_id, "is_bot": False, "first_name": f"Tecnico {self.n}"},
+                "chat_instance": str(self.chat_id),
+                "data": dato,
+                "message": self.ultimo_mensaje,
+            }}
+
+        msg = self._base_mensaje()
+        if tipo == "comando":
+            msg["text"] = dato
+            msg["entities"] = [{"type": "bot_command", "offset": 0, "length": len(dato)}]
+        elif tipo == "texto":
+            msg["text"] = dato
+        elif tipo == "foto":
+            msg["photo"] = [{"file_id": f"foto_{self.chat_id}_{self._update_id}", "file_unique_id": "u",
+                             "width": 1280, "height": 960, "file_size": len(self.e.telegram.foto)}]
+        elif tipo in ("ubicacion", "vivo"):
+            self.lat += self._rng.uniform(-0.002, 0.002)
+            self.lon += self._rng.uniform(-0.002, 0.002)
+            msg["location"] = {"latitude": self.lat, "longitude": self.lon, "live_period": 28800}
+            if tipo == "vivo":
+                msg["edit_date"] = int(time.time())
+                return {"update_id": self._update_id, "edited_message": msg}
+        return {"update_id": self._update_id, "message": msg}
+
+    async def _enviar(self, tipo: str, dato):
+        from telegram import Update
+
+        update = Update.de_json(self._update(tipo, dato), self.e.app.bot)
+        await self.e.app.update_queue.put(update)
+
+    # ---------- flujo ----------
+
+    async def _paso(self, nombre: str, tipo: str, dato, esperado: str) -> bool:
+        bandeja = self.e.telegram.bandeja(self.chat_id)
+        while not bandeja.empty():
+            bandeja.get_nowait()
+
+        t0 = time.perf_counter()
+        await self._enviar(tipo, dato)
+        try:
+            _, t_respuesta, mensaje = await asyncio.wait_for(bandeja.get(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.resultados["timeouts"][nombre] += 1
+            return False
+        self.ultimo_mensaje = mensaje
+        self.resultados["latencias"][nombre].append(t_respuesta - t0)
+
+        paso = self.e.main.user_data.get(self.chat_id, {}).get("paso")
+        if paso != esperado:
+            self.resultados["fallos"][nombre] += 1
+            return False
+        return True
+
+    async def recorrer(self):
+        t0 = time.perf_counter()
+        for nombre, tipo, dato, esperado in FLUJO_TECNICO:
+            if nombre == "id_phoenix":
+                dato = str(self.n + 1)
+            elif nombre == "tipo":
+                dato = self.tipo
+            if not await self._paso(nombre, tipo, dato, esperado):
+                self.resultados["abandonos"] += 1
+                return
+            if self.pausa:
+                # Tiempo de lectura/toque del técnico entre pasos
+                await asyncio.sleep(self._rng.uniform(0.5, 1.5) * self.pausa)
+            if nombre == "ubicacion_inicio":
+                # Actualizaciones de la ubicación en vivo durante la jornada (sin respuesta)
+                for _ in range(self.vivos):
+                    await self._enviar("vivo", None)
+        self.resultados["flujos"].append(time.perf_counter() - t0)
+
+
+async def correr(args) -> dict:
+    entorno = Entorno(args)
+    entorno.preparar()
+    await entorno.iniciar()
+
+    resultados = {
+        "latencias": defaultdict(list),
+        "timeouts": defaultdict(int),
+        "fallos": defaultdict(int),
+        "abandonos": 0,
+        "flujos": [],
+    }
+    tecnicos = [
+        Tecnico(entorno, i, resultados, args.tipo, args.vivos, args.timeout, args.pausa)
+        for i in range(args.tecnicos)
+    ]
+
+    async def lanzar(i, tecnico):
+        if args.rampa:
+            await asyncio.sleep(args.rampa * i / max(1, args.tecnicos))
+        await tecnico.recorrer()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(lanzar(i, t) for i, t in enumerate(tecnicos)))
+    duracion = time.perf_counter() - t0
+
+    reporte = {
+        "tecnicos": args.tecnicos,
+        "duracion_s": round(duracion, 2),
+        "flujos_completos": len(resultados["flujos"]),
+        "abandonos": resultados["abandonos"],
+        "flujos_por_min": round(len(resultados["flujos"]) / duracion * 60, 1) if duracion else 0.0,
+        "pasos_por_seg": round(sum(len(v) for v in resultados["latencias"].values()) / duracion, 2) if duracion else 0.0,
+        "flujo_p50_s": round(percentil(resultados["flujos"], 0.50), 2),
+        "flujo_p95_s": round(percentil(resultados["flujos"], 0.95), 2),
+        "pasos": {},
+        "concurrencia": entorno.main.PROCESADOR_UPDATES.estadisticas(),
+        "salida_telegram": entorno.main.LIMITADOR_SALIDA.estadisticas(),
+        "llamadas": {
+            "telegram": dict(entorno.telegram.llamadas),
+            "sheets": dict(entorno.sheets.llamadas),
+            "drive": dict(entorno.drive.llamadas),
+            "geocoding": dict(entorno.geocoding.llamadas),
+        },
+    }
+    for nombre, *_ in FLUJO_TECNICO:
+        lat = resultados["latencias"].get(nombre, [])
+        reporte["pasos"][nombre] = {
+            "n": len(lat),
+            "p50_ms": round(percentil(lat, 0.50) * 1000, 1),
+            "p95_ms": round(percentil(lat, 0.95) * 1000, 1),
+            "p99_ms": round(percentil(lat, 0.99) * 1000, 1),
+            "max_ms": round(max(lat) * 1000, 1) if lat else 0.0,
+            "timeouts": resultados["timeouts"].get(nombre, 0),
+            "fallos": resultados["fallos"].get(nombre, 0),
+        }
+
+    await entorno.detener()
+    return reporte
+
+
+def imprimir(reporte: dict):
+    print(f"\n👷 {reporte['tecnicos']} técnicos | {reporte['duracion_s']} s | "
+          f"{reporte['flujos_completos']} flujos completos, {reporte['abandonos']} abandonados")
+    print(f"⚡ {reporte['flujos_por_min']} flujos/min | {reporte['pasos_por_seg']} pasos/s | "
+          f"flujo p50 {reporte['flujo_p50_s']} s, p95 {reporte['flujo_p95_s']} s\n")
+    print(f"{'paso':<26}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'timeout':>9}{'fallo':>7}")
+    for nombre, r in reporte["pasos"].items():
+        print(f"{nombre:<26}{r['n']:>6}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+              f"{r['max_ms']:>10}{r['timeouts']:>9}{r['fallos']:>7}")
+    print(f"\n🚦 Concurrencia: {reporte['concurrencia']}")
+    print(f"🚥 Salida Telegram: {reporte['salida_telegram']}")
+    for api, llamadas in reporte["llamadas"].items():
+        print(f"📞 {api}: {llamadas}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del flujo de asistencia")
+    parser.add_argument("--tecnicos", type=int, default=20)
+    parser.add_argument("--rampa", type=float, default=5.0, help="segundos para arrancar a todos los técnicos")
+    parser.add_argument("--tipo", default="tipo_reg", choices=["tipo_disp", "tipo_reg", "tipo_ord"])
+    parser.add_argument("--vivos", type=int, default=3, help="updates de ubicación en vivo por jornada")
+    parser.add_argument("--timeout", type=float, default=60.0, help="máximo de espera por respuesta (s)")
+    parser.add_argument("--pausa", type=float, default=1.5,
+                        help="segundos (promedio) que el técnico tarda entre pasos; 0 = sin pausa")
+    parser.add_argument("--lat-sheets", type=float, default=150)
+    parser.add_argument("--lat-drive", type=float, default=300)
+    parser.add_argument("--lat-telegram", type=float, default=60)
+    parser.add_argument("--lat-geocoding", type=float, default=200)
+    parser.add_argument("--error-sheets", type=float, default=0.0)
+    parser.add_argument("--error-drive", type=float, default=0.0)
+    parser.add_argument("--error-geocoding", type=float, default=0.0)
+    parser.add_argument("--tasa-429", type=float, default=0.0)
+    parser.add_argument("--json", help="guardar el reporte en este archivo")
+    parser.add_argument("--verbose", action="store_true", help="mostrar los logs del bot")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    reporte = asyncio.run(correr(args))
+    imprimir(reporte)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+    return 0 if reporte["abandonos"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,453 @@
+"""
+Dobles en proceso de Telegram Bot API, Google Sheets, Google Drive y Geocoding.
+
+Sirven para correr los handlers reales de main.py sin tocar producción: cada
+backend tiene una latencia configurable (media ± jitter) y una tasa de fallos
+inyectados. Los de Google imitan la cadena de googleapiclient
+(`service.spreadsheets().values().get(...).execute()`), así que el código del bot
+no cambia; se instalan con `instalar_google_falso()` ANTES de importar main.
+"""
+import io
+import re
+import json
+import time
+import random
+import asyncio
+import threading
+from collections import Counter
+
+from telegram.request import BaseRequest
+
+
+class FallaInyectada(RuntimeError):
+    """Error simulado por un backend falso."""
+
+
+class Latencia:
+    """Latencia `media_ms` ± `jitter_ms` y probabilidad `tasa_error` de fallar."""
+
+    def __init__(self, media_ms: float = 0, jitter_ms: float = 0, tasa_error: float = 0.0, semilla=None):
+        self.media_ms = media_ms
+        self.jitter_ms = jitter_ms
+        self.tasa_error = tasa_error
+        self._rng = random.Random(semilla)
+
+    def _muestra_s(self) -> float:
+        return max(0.0, self.media_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def _falla(self) -> bool:
+        return self.tasa_error > 0 and self._rng.random() < self.tasa_error
+
+    def esperar(self, que: str):
+        """Versión bloqueante (los clientes de Google son síncronos)."""
+        time.sleep(self._muestra_s())
+        if self._falla():
+            raise FallaInyectada(f"falla inyectada en {que}")
+
+    async def esperar_async(self) -> bool:
+        """Devuelve True si esta llamada debe fallar."""
+        await asyncio.sleep(self._muestra_s())
+        return self._falla()
+
+
+# ==============================================================================
+# 🧾 GOOGLE SHEETS
+# ==============================================================================
+
+def _col_a_indice(col: str) -> int:
+    n = 0
+    for c in col:
+        n = n * 26 + (ord(c) - 64)
+    return n - 1
+
+
+def _parsear_a1(rango: str):
+    """'Hoja!A2:C' → ('Hoja', fila0, col0, fila1|None, col1). Filas 1-based."""
+    hoja, _, celdas = rango.rpartition("!")
+    hoja = hoja.strip("'") or None
+    inicio, _, fin = celdas.partition(":")
+    fin = fin or inicio
+    m1 = re.fullmatch(r"([A-Z]+)(\d*)", inicio)
+    m2 = re.fullmatch(r"([A-Z]+)(\d*)", fin)
+    fila0 = int(m1.group(2)) if m1.group(2) else 1
+    fila1 = int(m2.group(2)) if m2.group(2) else None
+    return hoja, fila0, _col_a_indice(m1.group(1)), fila1, _col_a_indice(m2.group(1))
+
+
+def _cuerpo(body):
+    """
+    Como googleapiclient al armar la petición: el body viaja como JSON, así que
+    algo que no se serializa falla acá (al crear la petición, antes de `execute`).
+    """
+    return None if body is None else json.loads(json.dumps(body))
+
+
+class _Peticion:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self, num_retries=0):
+        return self._fn()
+
+
+class SheetsFalso:
+    """Hojas en memoria: {spreadsheet_id: {titulo_hoja: [[celdas]]}}."""
+
+    def __init__(self, latencia: Latencia = None):
+        self.latencia = latencia or Latencia()
+        self.libros = {}
+        self.llamadas = Counter()
+        self._lock = threading.Lock()
+
+    # -- datos --
+    def hoja(self, ssid: str, titulo: str = None) -> list:
+        libro = self.libros.setdefault(ssid, {})
+        if titulo is None:
+            titulo = next(iter(libro), "Hoja 1")
+        return libro.setdefault(titulo, [])
+
+    def _llamar(self, metodo: str, fn):
+        def ejecutar():
+            self.llamadas[metodo] += 1
+            self.latencia.esperar(f"sheets.{metodo}")
+            with self._lock:
+                return fn()
+        return _Peticion(ejecutar)
+
+    # -- API estilo googleapiclient --
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return _ValoresFalsos(self)
+
+    def get(self, spreadsheetId, **kwargs):
+        def fn():
+            libro = self.libros.setdefault(spreadsheetId, {})
+            libro.setdefault("Registros", [])
+            return {"sheets": [
+                {"properties": {"title": t, "sheetId": i}} for i, t in enumerate(libro)
+            ]}
+        return self._llamar("spreadsheets.get", fn)
+
+    def batchUpdate(self, spreadsheetId, body, **kwargs):
+        body = _cuerpo(body)
+
+        def fn():
+            for req in body.get("requests", []):
+                if "addSheet" in req:
+                    self.hoja(spreadsheetId, req["addSheet"]["properties"]["title"])
+            return {"replies": []}
+        return self._llamar("spreadsheets.batchUpdate", fn)
+
+    def leer(self, ssid: str, rango: str, columnas: bool = False) -> list:
+        titulo, f0, c0, f1, c1 = _parsear_a1(rango)
+        filas = self.hoja(ssid, titulo)
+        f1 = len(filas) if f1 is None else min(f1, len(filas))
+        salida = []
+        for fila in filas[f0 - 1:f1]:
+            valores = fila[c0:c1 + 1]
+            while valores and valores[-1] in ("", None):
+                valores.pop()
+            salida.append(valores)
+        while salida and not salida[-1]:
+            salida.pop()
+        if columnas:
+            ancho = c1 - c0 + 1
+            salida = [[f[i] if i < len(f) else "" for f in salida] for i in range(ancho)]
+        return salida
+
+    def escribir(self, ssid: str, rango: str, valores: list):
+        titulo, f0, c0, _, _ = _parsear_a1(rango)
+        filas = self.hoja(ssid, titulo)
+        for i, fila_valores in enumerate(valores):
+            idx = f0 - 1 + i
+            while len(filas) <= idx:
+                filas.append([])
+            fila = filas[idx]
+            while len(fila) < c0 + len(fila_valores):
+                fila.append("")
+            fila[c0:c0 + len(fila_valores)] = fila_valores
+
+
+class _ValoresFalsos:
+    def __init__(self, sheets: SheetsFalso):
+        self.s = sheets
+
+    def get(self, spreadsheetId, range, **kwargs):
+        return self.s._llamar("values.get", lambda: {
+            "range": range, "values": self.s.leer(spreadsheetId, range)
+        })
+
+    def batchGet(self, spreadsheetId, ranges, majorDimension="ROWS", **kwargs):
+        columnas = majorDimension == "COLUMNS"
+        return self.s._llamar("values.batchGet", lambda: {"valueRanges": [
+            {"range": r, "values": self.s.leer(spreadsheetId, r, columnas)} for r in ranges
+        ]})
+
+    def update(self, spreadsheetId, range, body, **kwargs):
+        body = _cuerpo(body)
+
+        def fn():
+            self.s.escribir(spreadsheetId, range, body["values"])
+            return {"updatedRange": range}
+        return self.s._llamar("values.update", fn)
+
+    def batchUpdate(self, spreadsheetId, body, **kwargs):
+        body = _cuerpo(body)
+
+        def fn():
+            for d in body.get("data", []):
+                self.s.escribir(spreadsheetId, d["range"], d["values"])
+            return {"totalUpdatedCells": len(body.get("data", []))}
+        return self.s._llamar("values.batchUpdate", fn)
+
+    def append(self, spreadsheetId, range, body, **kwargs):
+        body = _cuerpo(body)
+
+        def fn():
+            titulo = _parsear_a1(range)[0]
+            filas = self.s.hoja(spreadsheetId, titulo)
+            inicio = len(filas) + 1
+            for fila in body["values"]:
+                filas.append(list(fila))
+            fin = len(filas)
+            return {"updates": {"updatedRange": f"{titulo}!A{inicio}:A{fin}"}}
+        return self.s._llamar("values.append", fn)
+
+
+# ==============================================================================
+# 📁 GOOGLE DRIVE
+# ==============================================================================
+
+class _EstadoSubida:
+    def __init__(self, progreso: float):
+        self._p = progreso
+
+    def progress(self):
+        return self._p
+
+
+class _SubidaFalsa:
+    """Imita la subida resumable: un `next_chunk()` por fragmento."""
+
+    def __init__(self, drive, metadata, media):
+        self.drive = drive
+        self.metadata = metadata
+        self.media = media
+        self.total = max(1, media.size() if media is not None else 1)
+        self.chunk = getattr(media, "chunksize", lambda: self.total)()
+        self.enviado = 0
+
+    def next_chunk(self, num_retries=0):
+        self.drive.llamadas["files.create.chunk"] += 1
+        self.drive.latencia.esperar("drive.next_chunk")
+        self.enviado = min(self.total, self.enviado + self.chunk)
+        if self.enviado < self.total:
+            return _EstadoSubida(self.enviado / self.total), None
+        archivo = self.drive._crear(self.metadata, self.total)
+        return None, archivo
+
+    def execute(self, num_retries=0):
+        respuesta = None
+        while respuesta is None:
+            _, respuesta = self.next_chunk()
+        return respuesta
+
+
+class DriveFalso:
+    def __init__(self, latencia: Latencia = None, archivos: dict = None):
+        self.latencia = latencia or Latencia()
+        self.archivos = {}  # id -> {"id", "name", "mimeType", "size"}
+        self.llamadas = Counter()
+        self.bytes_subidos = 0
+        self._lock = threading.Lock()
+        self._n = 0
+        for nombre, file_id in (archivos or {}).items():
+            self.archivos[file_id] = {"id": file_id, "name": nombre}
+
+    def _crear(self, metadata: dict, size: int = 0) -> dict:
+        with self._lock:
+            self._n += 1
+            file_id = f"falso_{self._n}"
+            self.archivos[file_id] = {**metadata, "id": file_id, "size": size}
+            self.bytes_subidos += size
+        return {"id": file_id, "webViewLink": f"https://drive.falso/{file_id}"}
+
+    def _llamar(self, metodo: str, fn):
+        def ejecutar():
+            self.llamadas[metodo] += 1
+            self.latencia.esperar(f"drive.{metodo}")
+            return fn()
+        return _Peticion(ejecutar)
+
+    def files(self):
+        return self
+
+    def permissions(self):
+        return _PermisosFalsos(self)
+
+    def list(self, q: str = "", **kwargs):
+        def fn():
+            m = re.search(r"name='([^']*)'", q)
+            nombre = m.group(1) if m else None
+            return {"files": [
+                {"id": a["id"], "name": a["name"], "mimeType": a.get("mimeType")}
+                for a in self.archivos.values() if nombre is None or a["name"] == nombre
+            ]}
+        return self._llamar("files.list", fn)
+
+    def get(self, fileId, **kwargs):
+        return self._llamar("files.get", lambda: dict(self.archivos.get(fileId, {"id": fileId})))
+
+    def create(self, body=None, media_body=None, **kwargs):
+        body = _cuerpo(body)
+        if media_body is not None:
+            self.llamadas["files.create"] += 1
+            return _SubidaFalsa(self, body or {}, media_body)
+        return self._llamar("files.create", lambda: self._crear(body or {}))
+
+
+class _PermisosFalsos:
+    def __init__(self, drive: DriveFalso):
+        self.d = drive
+
+    def create(self, fileId, body=None, **kwargs):
+        _cuerpo(body)
+        return self.d._llamar("permissions.create", lambda: {"id": "permiso_falso"})
+
+
+def instalar_google_falso(drive: DriveFalso, sheets: SheetsFalso):
+    """
+    Reemplaza `googleapiclient.discovery.build` y las credenciales de cuenta de
+    servicio para que `get_services()` de main.py devuelva los dobles.
+    Debe llamarse antes de `import main`.
+    """
+    import os
+    from googleapiclient import discovery
+    from google.oauth2 import service_account
+
+    os.environ.setdefault("GOOGLE_CREDENTIALS_JSON", "{}")
+    servicios = {"drive": drive, "sheets": sheets}
+    discovery.build = lambda nombre, version, **kwargs: servicios[nombre]
+    service_account.Credentials.from_service_account_info = classmethod(lambda cls, info, **kw: object())
+
+
+# ==============================================================================
+# 🌎 GEOCODING
+# ==============================================================================
+
+class GeocodingFalso:
+    """Mismo contrato que geocoding.ClienteGeocodingAsync."""
+
+    def __init__(self, latencia: Latencia = None):
+        self.latencia = latencia or Latencia()
+        self.llamadas = Counter()
+
+    async def reverse(self, lat: float, lon: float) -> dict:
+        self.llamadas["reverse"] += 1
+        if await self.latencia.esperar_async():
+            raise FallaInyectada("falla inyectada en geocoding.reverse")
+        return {"departamento": "LIMA", "provincia": "LIMA", "distrito": "MIRAFLORES"}
+
+    async def cerrar(self):
+        pass
+
+
+# ==============================================================================
+# 🤖 TELEGRAM BOT API
+# ==============================================================================
+
+def jpeg_de_prueba(ancho: int = 1280, alto: int = 960) -> bytes:
+    """Selfie sintética con ruido (para que la compresión cueste como una real)."""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(3)
+    base = np.linspace(0, 215, ancho)[None, :, None].repeat(alto, 0).repeat(3, 2)
+    ruido = rng.integers(0, 40, (alto, ancho, 3))
+    buff = io.BytesIO()
+    Image.fromarray((base + ruido).astype(np.uint8)).save(buff, "JPEG", quality=92)
+    return buff.getvalue()
+
+
+class TelegramFalso(BaseRequest):
+    """
+    Capa HTTP falsa del Bot API para `ApplicationBuilder().request(...)`.
+    Responde como Telegram y deja en `bandeja[chat_id]` cada mensaje que el bot envía
+    o edita, para que el simulador mida cuánto tardó la respuesta.
+    """
+
+    def __init__(self, latencia: Latencia = None, tasa_429: float = 0.0, foto: bytes = None):
+        self.latencia = latencia or Latencia()
+        self.tasa_429 = tasa_429
+        self.foto = foto or jpeg_de_prueba()
+        self.llamadas = Counter()
+        self.bandejas = {}
+        self._rng = random.Random(11)
+        self._msg_id = 1000
+
+    def bandeja(self, chat_id: int) -> asyncio.Queue:
+        if chat_id not in self.bandejas:
+            self.bandejas[chat_id] = asyncio.Queue()
+        return self.bandejas[chat_id]
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    @staticmethod
+    def _ok(resultado) -> tuple:
+        return 200, json.dumps({"ok": True, "result": resultado}).encode()
+
+    def _mensaje(self, chat_id, texto=None) -> dict:
+        self._msg_id += 1
+        return {
+            "message_id": self._msg_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": texto or "",
+        }
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        if "/file/bot" in url:
+            self.llamadas["download"] += 1
+            await self.latencia.esperar_async()
+            return 200, self.foto
+
+        endpoint = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data is not None else {}
+        self.llamadas[endpoint] += 1
+
+        if await self.latencia.esperar_async():
+            return 500, json.dumps({"ok": False, "error_code": 500, "description": "Falla inyectada"}).encode()
+        if self.tasa_429 and endpoint.startswith(("send", "edit")) and self._rng.random() < self.tasa_429:
+            return 429, json.dumps({
+                "ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                "parameters": {"retry_after": 1},
+            }).encode()
+
+        if endpoint == "getMe":
+            return self._ok({"id": 1, "is_bot": True, "first_name": "Asistencia", "username": "asistencia_falso_bot",
+                             "can_join_groups": False, "can_read_all_group_messages": False,
+                             "supports_inline_queries": False})
+        if endpoint == "getFile":
+            return self._ok({"file_id": params.get("file_id"), "file_unique_id": "u",
+                             "file_size": len(self.foto), "file_path": "photos/selfie.jpg"})
+        if endpoint == "answerCallbackQuery":
+            return self._ok(True)
+        if endpoint in ("sendMessage", "editMessageText", "sendPhoto", "editMessageReplyMarkup"):
+            chat_id = int(params.get("chat_id", 0))
+            mensaje = self._mensaje(chat_id, params.get("text"))
+            if "reply_markup" in params:
+                mensaje["reply_markup"] = params["reply_markup"]
+            self.bandeja(chat_id).put_nowait((endpoint, time.perf_counter(), mensaje))
+            return self._ok(mensaje)
+        return self._ok(True)
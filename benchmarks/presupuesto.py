@@ -0,0 +1,160 @@
+"""
+Presupuesto de llamadas a APIs externas por asistencia completa.
+
+Corre un flujo completo de técnico (el mismo de benchmarks/carga.py) por cada tipo
+de cuadrilla contra los dobles en proceso, cuenta con CONTADOR_LLAMADAS cada llamada
+a Sheets, Drive, Geocoding y Telegram, y la compara con PRESUPUESTO. Cualquier
+diferencia (una llamada de más o de menos) hace salir con código 1, así que un
+round trip nuevo no pasa desapercibido: si el cambio es intencional, se actualiza
+la tabla en el mismo commit.
+
+El chequeo que corre con la suite es tests/test_presupuesto.py (misma tabla, mismo
+flujo); este script sirve para ver el detalle por handler cuando falla.
+
+Uso (desde la raíz del repo):
+    python -m pytest tests/test_presupuesto.py
+    python -m benchmarks.presupuesto [--detalle] [--json presupuesto.json]
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+import logging
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.carga import Entorno, Tecnico  # noqa: E402
+
+# Llamadas por asistencia (check-in + check-out + volcado del recorrido), "api.método": n.
+# Con un round trip nuevo el chequeo falla: si es intencional, se actualiza esta tabla.
+_COMUN = {
+    # Buscar la cuadrilla, ubicar/crear la hoja del día y la fila activa
+    "drive.files.list": 2,
+    "sheets.spreadsheets.get": 1,
+    "sheets.spreadsheets.values.get": 9,
+    "sheets.spreadsheets.values.append": 1,
+    # Celdas sueltas: cabeceras, link de cada selfie y hora de ingreso/salida
+    "sheets.spreadsheets.values.update": 5,
+    # Un lote por ubicación: inicio (coordenadas, dirección, zona) y salida (+ recorrido)
+    "sheets.spreadsheets.values.batchUpdate": 2,
+    # Selfies de inicio y de salida: subida de un fragmento + permiso de lectura
+    "drive.files.create": 2,
+    "drive.permissions.create": 2,
+    # Dirección de la ubicación de inicio y de salida (fuera de cobertura local)
+    "geocoding.reverse": 2,
+    "telegram.sendMessage": 7,
+    "telegram.editMessageText": 5,
+    "telegram.answerCallbackQuery": 5,
+    "telegram.getFile": 2,
+    "telegram.descargarArchivo": 2,
+}
+
+# Régimen estable: el primer flujo del día sobre una hoja escribe además la fila de
+# cabeceras (1 values.update); por eso se mide después de un flujo de calentamiento.
+PRESUPUESTO = {
+    "tipo_disp": dict(_COMUN),
+    "tipo_reg": dict(_COMUN),
+    "tipo_ord": dict(_COMUN),
+}
+
+VIVOS_POR_JORNADA = 3
+
+
+def _args(tecnicos: int) -> argparse.Namespace:
+    """Dobles sin latencia ni fallos: el conteo tiene que ser determinista."""
+    return argparse.Namespace(
+        tecnicos=tecnicos, lat_sheets=0, lat_drive=0, lat_telegram=0, lat_geocoding=0,
+        error_sheets=0.0, error_drive=0.0, error_geocoding=0.0, tasa_429=0.0,
+    )
+
+
+async def _esperar_inactivo(main):
+    """Hasta que no quede ningún handler ni job del executor en curso."""
+    while main.CICLO.en_curso():
+        await asyncio.sleep(0.02)
+
+
+def _plano(conteo: dict) -> dict:
+    return {f"{api}.{metodo}": n for api, metodos in conteo.items() for metodo, n in metodos.items()}
+
+
+async def medir() -> dict:
+    tipos = list(PRESUPUESTO)
+    entorno = Entorno(_args(len(tipos) + 1))
+    entorno.preparar()
+    await entorno.iniciar()
+    main = entorno.main
+    contador = main.CONTADOR_LLAMADAS
+
+    async def flujo(n: int, tipo: str) -> bool:
+        resultados_flujo = {"latencias": defaultdict(list), "timeouts": defaultdict(int),
+                            "fallos": defaultdict(int), "abandonos": 0, "flujos": []}
+        tecnico = Tecnico(entorno, n, resultados_flujo, tipo, VIVOS_POR_JORNADA, timeout=30.0)
+        await tecnico.recorrer()
+        await _esperar_inactivo(main)
+        # El recorrido en vivo se escribe en el volcado periódico: también es parte del costo
+        await main.con_origen("job:volcar_recorridos", main.volcar_recorridos)()
+        return not resultados_flujo["abandonos"]
+
+    resultados = {}
+    try:
+        await flujo(0, "tipo_reg")  # calentamiento: cabeceras de la hoja del día
+        for n, tipo in enumerate(tipos, start=1):
+            contador.reiniciar()
+            completo = await flujo(n, tipo)
+            resultados[tipo] = {
+                "completo": completo,
+                "llamadas": _plano(contador.por_api()),
+                "por_origen": contador.por_origen(),
+            }
+    finally:
+        await entorno.detener()
+    return resultados
+
+
+def comparar(esperado: dict, medido: dict) -> list:
+    """[(llamada, esperado, medido)] de todo lo que no coincide."""
+    claves = sorted(set(esperado) | set(medido))
+    return [(c, esperado.get(c, 0), medido.get(c, 0)) for c in claves if esperado.get(c, 0) != medido.get(c, 0)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chequeo del presupuesto de llamadas por asistencia")
+    parser.add_argument("--detalle", action="store_true", help="mostrar las llamadas por handler")
+    parser.add_argument("--json", help="guardar lo medido en este archivo")
+    parser.add_argument("--verbose", action="store_true", help="mostrar los logs del bot")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    resultados = asyncio.run(medir())
+
+    falla = False
+    for tipo, r in resultados.items():
+        diferencias = comparar(PRESUPUESTO[tipo], r["llamadas"])
+        total = sum(r["llamadas"].values())
+        if not r["completo"]:
+            falla = True
+            print(f"❌ {tipo}: el flujo no se completó")
+        elif diferencias:
+            falla = True
+            print(f"❌ {tipo}: {total} llamadas, fuera de presupuesto")
+            for llamada, esperado, medido in diferencias:
+                print(f"     {llamada:<42} esperado {esperado:>3}  medido {medido:>3}  ({medido - esperado:+d})")
+        else:
+            print(f"✅ {tipo}: {total} llamadas, dentro de presupuesto")
+        if args.detalle or (falla and diferencias):
+            for origen, llamadas in r["por_origen"].items():
+                print(f"     [{origen}] {llamadas}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    return 1 if falla else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
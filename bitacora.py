@@ -0,0 +1,200 @@
+"""
+Logging sin E/S en el event loop: los handlers sólo encolan y un hilo aparte
+(QueueListener) escribe en stderr, en texto o en JSON (una línea por registro).
+
+- Muestreo por categoría: la categoría es la etiqueta inicial del mensaje
+  (`[GEO CHECK] ...` -> "GEO CHECK") o, si no tiene, el nombre del logger
+  ("httpx"). Con `{"GEO CHECK": 10}` se escribe 1 de cada 10 líneas de esa
+  categoría. Sólo se muestrea por debajo de WARNING.
+- Las categorías de `SIEMPRE` ([EVIDENCIA]) no se muestrean, no se descartan
+  con la cola llena y se escriben aunque el nivel configurado sea más alto.
+- Cola acotada: si el hilo escritor no da abasto, se descartan líneas (y se
+  cuentan) en lugar de frenar el bot.
+"""
+import re
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+FORMATO_TEXTO = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+SIEMPRE = ("EVIDENCIA",)
+
+_ETIQUETA = re.compile(r"\s*\[([^\[\]]{1,40})\]")
+
+
+def categoria_de(record: logging.LogRecord) -> str:
+    m = _ETIQUETA.match(record.getMessage())
+    return m.group(1).strip().upper() if m else record.name
+
+
+def parsear_muestreo(texto: str) -> dict:
+    """'GEO CHECK=10,httpx=20' -> {"GEO CHECK": 10, "httpx": 20}. Ignora entradas mal formadas."""
+    tasas = {}
+    for parte in (texto or "").split(","):
+        categoria, _, n = parte.partition("=")
+        categoria = categoria.strip()
+        try:
+            n = int(n)
+        except ValueError:
+            continue
+        if categoria and n > 1:
+            tasas[categoria] = n
+    return tasas
+
+
+class FiltroMuestreo(logging.Filter):
+    """1 de cada N registros por categoría; WARNING o más y `SIEMPRE` pasan siempre."""
+
+    def __init__(self, tasas: dict, nivel: int = logging.INFO, siempre: tuple = SIEMPRE):
+        super().__init__()
+        self.tasas = dict(tasas)
+        self.nivel = nivel
+        self.siempre = set(siempre)
+        self._vistos = Counter()
+        self.descartados = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        categoria = categoria_de(record)
+        record.categoria = categoria
+        if categoria in self.siempre:
+            return True
+        if record.levelno < self.nivel:
+            return False
+        n = self.tasas.get(categoria)
+        if not n or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            visto = self._vistos[categoria]
+            self._vistos[categoria] = visto + 1
+            if visto % n:
+                self.descartados[categoria] += 1
+                return False
+        return True
+
+
+class ManejadorCola(QueueHandler):
+    """
+    Encola el registro ya resuelto: mensaje formateado, traceback como texto y el
+    contexto del hilo que loguea (`contexto()` -> dict, p. ej. trace_id/origen),
+    que del otro lado de la cola ya no se puede leer.
+    """
+
+    def __init__(self, cola: queue.Queue, contexto=None):
+        super().__init__(cola)
+        self.contexto = contexto
+        self.descartados_cola = 0
+        self._formateador = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = self._formateador.formatException(record.exc_info)
+            record.exc_info = None
+        if self.contexto is not None:
+            try:
+                for campo, valor in self.contexto().items():
+                    setattr(record, campo, valor)
+            except Exception:
+                pass
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if getattr(record, "categoria", None) in SIEMPRE:
+                self.queue.put(record)  # la evidencia espera su lugar
+            else:
+                self.descartados_cola += 1
+
+
+class FormateadorJSON(logging.Formatter):
+    """Una línea JSON por registro (para Loki / Cloud Logging)."""
+
+    CONTEXTO = ("trace_id", "origen", "inquilino")
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "categoria": getattr(record, "categoria", record.name),
+            "mensaje": record.getMessage(),
+        }
+        for campo in self.CONTEXTO:
+            valor = getattr(record, campo, None)
+            if valor:
+                datos[campo] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            datos["excepcion"] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class Bitacora:
+    """Cola + hilo escritor instalados en el logger raíz (ver `configurar_logging`)."""
+
+    def __init__(self, formato: str = "texto", nivel: int = logging.INFO, muestreo: dict = None,
+                 max_cola: int = 10000, contexto=None, destino=None):
+        self.cola = queue.Queue(maxsize=max_cola)
+        self.filtro = FiltroMuestreo(muestreo or {}, nivel)
+        self.manejador = ManejadorCola(self.cola, contexto)
+        self.manejador.addFilter(self.filtro)
+
+        salida = logging.StreamHandler(destino or sys.stderr)
+        salida.setFormatter(FormateadorJSON() if formato == "json" else logging.Formatter(FORMATO_TEXTO))
+        self.listener = QueueListener(self.cola, salida)
+        self.formato = formato
+        self._activa = False
+
+    def iniciar(self):
+        if not self._activa:
+            self.listener.start()
+            self._activa = True
+
+    def detener(self):
+        """Escribe lo que quedó en la cola y detiene el hilo."""
+        if self._activa:
+            self._activa = False
+            self.listener.stop()
+
+    def estadisticas(self) -> dict:
+        return {
+            "formato": self.formato,
+            "en_cola": self.cola.qsize(),
+            "descartados_cola": self.manejador.descartados_cola,
+            "muestreados": dict(self.filtro.descartados),
+        }
+
+
+def configurar_logging(formato: str = "texto", nivel="INFO", muestreo: dict = None,
+                       max_cola: int = 10000, contexto=None) -> Bitacora:
+    """
+    Reemplaza los handlers del logger raíz por la cola y arranca el hilo escritor.
+    El raíz queda en INFO como mínimo para que [EVIDENCIA] llegue al filtro aunque
+    `nivel` sea WARNING; el filtro aplica `nivel` al resto.
+    """
+    nivel = logging.getLevelName(nivel.upper()) if isinstance(nivel, str) else nivel
+    if not isinstance(nivel, int):
+        nivel = logging.INFO
+
+    bitacora = Bitacora(formato, nivel, muestreo, max_cola, contexto)
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(bitacora.manejador)
+    raiz.setLevel(min(nivel, logging.INFO))
+    bitacora.iniciar()
+    atexit.register(bitacora.detener)
+    return bitacora
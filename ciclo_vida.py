@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import signal
+import asyncio
+import logging
+import contextvars
+from datetime import datetime, timedelta, timezone
+
+from telegram.ext import ApplicationHandlerStop
+
+logger = logging.getLogger(__name__)
+
+
+# ==============================================================================
+# 🛑 CICLO DE VIDA: APAGADO ORDENADO CON DRENADO DEL TRABAJO EN CURSO
+# ==============================================================================
+
+class GestorCicloVida:
+    """
+    Lleva la cuenta de todo el trabajo en segundo plano (handlers en curso, jobs del
+    executor y tareas sueltas) para que, al recibir SIGTERM, el bot:
+
+    1. deje de recibir updates (lo hace quien llama: updater o servidor webhook),
+    2. espere lo que está en curso hasta `plazo_s` segundos,
+    3. vacíe las escrituras pendientes en Sheets (funciones registradas con `al_vaciar`),
+    4. persista en `ruta_diferidos` lo que no alcanzó a completarse, para retomarlo
+       en el siguiente arranque con `restaurar()`.
+    """
+
+    def __init__(self, plazo_s: float = 25, ruta_diferidos: str = "trabajo_diferido.json"):
+        self.plazo_s = plazo_s
+        self.ruta_diferidos = ruta_diferidos
+        self.aceptando = True
+        self._en_curso = {}        # future/tarea -> etiqueta
+        self._vaciados = []        # [(nombre, coroutine function)]
+        self._persistencias = {}   # nombre -> (exportar, importar)
+        self.completados = 0
+
+    # ---------- registro de trabajo ----------
+
+    def _seguir(self, fut, etiqueta: str):
+        self._en_curso[fut] = etiqueta
+        fut.add_done_callback(self._terminado)
+        return fut
+
+    def _terminado(self, fut):
+        self._en_curso.pop(fut, None)
+        self.completados += 1
+
+    def ejecutar(self, fn, *args, etiqueta: str = None):
+        """
+        Como `loop.run_in_executor(None, fn, *args)`, pero el job queda registrado y
+        corre con una copia del contexto (como `asyncio.to_thread`).
+        """
+        loop = asyncio.get_running_loop()
+        contexto = contextvars.copy_context()
+        fut = loop.run_in_executor(None, contexto.run, fn, *args)
+        return self._seguir(fut, etiqueta or getattr(fn, "__name__", "executor"))
+
+    def crear_tarea(self, coro, etiqueta: str = None) -> asyncio.Task:
+        tarea = asyncio.create_task(coro)
+        return self._seguir(tarea, etiqueta or tarea.get_name())
+
+    def seguir_tarea_actual(self, etiqueta: str):
+        """Registra la tarea que está corriendo (p. ej. el handler de un update)."""
+        tarea = asyncio.current_task()
+        if tarea is not None and tarea not in self._en_curso:
+            self._seguir(tarea, etiqueta)
+
+    def en_curso(self) -> list:
+        return sorted(self._en_curso.values())
+
+    # ---------- ganchos de apagado ----------
+
+    def al_vaciar(self, nombre: str, funcion):
+        """`funcion` es una coroutine function que escribe lo que quedó en buffer."""
+        self._vaciados.append((nombre, funcion))
+
+    def persistir_con(self, nombre: str, exportar, importar):
+        """
+        `exportar()` devuelve una lista JSON-serializable con lo que sigue pendiente;
+        `importar(lista)` la vuelve a encolar en el siguiente arranque.
+        """
+        self._persistencias[nombre] = (exportar, importar)
+
+    # ---------- apagado ----------
+
+    async def apagar(self) -> dict:
+        """Drena, vacía y persiste dentro del plazo. Devuelve el reporte del apagado."""
+        self.aceptando = False
+        t0 = time.monotonic()
+        limite = t0 + self.plazo_s
+        actual = asyncio.current_task()
+        completados_antes = self.completados
+
+        pendientes = [f for f in self._en_curso if f is not actual]
+        if pendientes:
+            logger.info(f"[APAGADO] Esperando {len(pendientes)} trabajos en curso (plazo {self.plazo_s:.0f}s)…")
+            await asyncio.wait(pendientes, timeout=max(0.0, limite - time.monotonic()))
+
+        vaciados, no_vaciados = [], []
+        for nombre, funcion in self._vaciados:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                no_vaciados.append(nombre)
+                continue
+            try:
+                await asyncio.wait_for(funcion(), timeout=restante)
+                vaciados.append(nombre)
+            except Exception as e:
+                logger.error(f"[APAGADO] No se pudo vaciar {nombre}: {e!r}")
+                no_vaciados.append(nombre)
+
+        abandonados = [e for f, e in self._en_curso.items() if f is not actual and not f.done()]
+        diferidos = self._guardar_diferidos(abandonados)
+
+        # Lo que no terminó se cancela para que PTB pueda cerrar; los hilos del
+        # executor siguen hasta terminar o hasta que el proceso salga.
+        for f in list(self._en_curso):
+            if f is not actual and isinstance(f, asyncio.Task) and not f.done():
+                f.cancel()
+
+        reporte = {
+            "duracion_s": round(time.monotonic() - t0, 2),
+            "completados": self.completados - completados_antes,
+            "abandonados": abandonados,
+            "vaciados": vaciados,
+            "no_vaciados": no_vaciados,
+            "diferidos": diferidos,
+        }
+        nivel = logging.WARNING if abandonados or no_vaciados or any(diferidos.values()) else logging.INFO
+        logger.log(nivel, f"[APAGADO] Reporte: {reporte}")
+        return reporte
+
+    def _guardar_diferidos(self, abandonados: list) -> dict:
+        datos, conteo = {}, {}
+        for nombre, (exportar, _) in self._persistencias.items():
+            try:
+                datos[nombre] = list(exportar())
+            except Exception as e:
+                logger.error(f"[APAGADO] No se pudo exportar {nombre}: {e!r}")
+                datos[nombre] = []
+            conteo[nombre] = len(datos[nombre])
+
+        if not any(datos.values()) and not abandonados:
+            return conteo
+        try:
+            tmp = self.ruta_diferidos + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"guardado": time.time(), "abandonados": abandonados, "pendientes": datos},
+                          f, ensure_ascii=False)
+            os.replace(tmp, self.ruta_diferidos)
+            logger.info(f"[APAGADO] Trabajo diferido guardado en {self.ruta_diferidos}")
+        except OSError as e:
+            logger.error(f"[APAGADO] No se pudo guardar {self.ruta_diferidos}: {e}")
+        return conteo
+
+    def restaurar(self) -> dict:
+        """Al arrancar: reencola lo diferido por el apagado anterior y borra el archivo."""
+        if not os.path.exists(self.ruta_diferidos):
+            return {}
+        try:
+            with open(self.ruta_diferidos, encoding="utf-8") as f:
+                datos = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"[ARRANQUE] {self.ruta_diferidos} ilegible: {e}")
+            return {}
+
+        if datos.get("abandonados"):
+            logger.warning(f"[ARRANQUE] El apagado anterior dejó sin terminar: {datos['abandonados']}")
+
+        restaurados = {}
+        for nombre, items in (datos.get("pendientes") or {}).items():
+            if nombre not in self._persistencias or not items:
+                continue
+            try:
+                self._persistencias[nombre][1](items)
+                restaurados[nombre] = len(items)
+            except Exception as e:
+                logger.error(f"[ARRANQUE] No se pudo restaurar {nombre}: {e!r}")
+        os.remove(self.ruta_diferidos)
+        logger.info(f"[ARRANQUE] Trabajo diferido restaurado: {restaurados}")
+        return restaurados
+
+
+async def esperar_senal_apagado() -> None:
+    """Bloquea hasta recibir SIGTERM/SIGINT."""
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, parar.set)
+        except NotImplementedError:
+            pass
+    await parar.wait()
+
+
+def fecha_update(update) -> datetime | None:
+    """
+    Cuándo ocurrió el update según Telegram. Los botones no traen la hora del clic:
+    se usa la del mensaje que los muestra.
+    """
+    if update.edited_message is not None:
+        return update.edited_message.edit_date or update.edited_message.date
+    if update.callback_query is not None:
+        mensaje = update.callback_query.message
+        return mensaje.date if mensaje is not None else None
+    mensaje = update.effective_message
+    return mensaje.date if mensaje is not None else None
+
+
+def descartar_updates_viejos(max_antiguedad_s: float, desde: datetime = None):
+    """
+    Callback para `TypeHandler(Update, ..., group=-1)`: corta el update si ocurrió
+    más de `max_antiguedad_s` segundos antes de `desde` (por defecto, ahora: el
+    arranque). Así, tras una caída larga, los botones y ubicaciones que quedaron
+    en cola no se aplican sobre la hoja del día; lo de un reinicio corto sí.
+    """
+    limite = (desde or datetime.now(timezone.utc)) - timedelta(seconds=max_antiguedad_s)
+
+    async def descartar(update, context):
+        fecha = fecha_update(update)
+        if fecha is not None and fecha < limite:
+            chat = update.effective_chat
+            logger.info(
+                f"[ARRANQUE] Update {update.update_id} de {chat.id if chat else '-'} descartado: "
+                f"ocurrió {fecha.isoformat()}, antes de la caída."
+            )
+            raise ApplicationHandlerStop
+    return descartar
+
+
+async def ejecutar_polling(apps, ciclo: GestorCicloVida, al_iniciar=None, al_detener=None,
+                           al_apagar=None, allowed_updates=None, descartar_pendientes=False):
+    """
+    Equivalente a `app.run_polling()` con apagado ordenado: al recibir la señal
+    se detienen los updaters, se drena con `ciclo.apagar()` y recién entonces se
+    detienen las Applications.
+
+    `apps` es una Application o una lista (varios bots en el mismo proceso);
+    `al_iniciar`, `al_detener` y `al_apagar` se llaman con cada una. Los updates
+    acumulados durante el reinicio se procesan, salvo con `descartar_pendientes=True`
+    (para acotarlos por antigüedad, ver `descartar_updates_viejos`).
+    """
+    apps = list(apps) if isinstance(apps, (list, tuple)) else [apps]
+    iniciadas = []
+    try:
+        for app in apps:
+            await app.initialize()
+            iniciadas.append(app)
+            if al_iniciar:
+                await al_iniciar(app)
+        for app in apps:
+            await app.updater.start_polling(drop_pending_updates=descartar_pendientes, allowed_updates=allowed_updates)
+            await app.start()
+        logger.info(f"🚀 [POLLING] Recibiendo updates ({len(apps)} bot(s)).")
+
+        await esperar_senal_apagado()
+        logger.info("🛑 [POLLING] Señal de apagado recibida: dejo de recibir updates.")
+        for app in apps:
+            await app.updater.stop()
+            if al_detener:
+                await al_detener(app)
+        await ciclo.apagar()
+    finally:
+        for app in iniciadas:
+            if app.updater.running:
+                await app.updater.stop()
+            if app.running:
+                await app.stop()
+        for app in iniciadas:
+            if al_apagar:
+                await al_apagar(app)
+            await app.shutdown()
@@ -0,0 +1,130 @@
+import time
+import asyncio
+import logging
+from contextlib import nullcontext
+
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+# ==============================================================================
+# 🚦 PROCESAMIENTO CONCURRENTE CON ORDEN POR CHAT
+# ==============================================================================
+
+class ProcesadorPorChat(BaseUpdateProcessor):
+    """
+    Procesa updates de chats distintos en paralelo (hasta `max_concurrent_updates`),
+    pero los de un mismo chat uno detrás de otro y en orden de llegada, para no
+    romper la máquina de estados de user_data.
+
+    El lock del chat se toma *antes* del cupo global: un chat con varios updates
+    en cola no ocupa cupos mientras espera su turno.
+
+    Si se pasa un `ciclo` (GestorCicloVida), cada update en curso queda registrado
+    para que el apagado ordenado lo espere.
+
+    Con un `trazador` (trazas.Trazador), cada update abre su traza; la espera por
+    el turno del chat queda como span `turno_chat`.
+    """
+
+    def __init__(self, max_concurrent_updates: int = 16, aviso_espera_s: float = 5.0, ciclo=None,
+                 trazador=None):
+        super().__init__(max_concurrent_updates)
+        self.aviso_espera_s = aviso_espera_s
+        self.ciclo = ciclo
+        self.trazador = trazador
+        self._locks = {}  # chat_id -> [asyncio.Lock, usuarios]
+        self.esperas = 0
+        self.espera_total_s = 0.0
+        self.espera_max_s = 0.0
+        self._muestras = []
+
+    @staticmethod
+    def _chat_id(update):
+        chat = getattr(update, "effective_chat", None)
+        return chat.id if chat else None
+
+    @staticmethod
+    def _tipo(update) -> str:
+        """Descripción corta del update para la traza (sin contenido del usuario)."""
+        if update.callback_query:
+            return f"boton:{update.callback_query.data}"
+        mensaje = update.message or update.edited_message
+        if mensaje is None:
+            return "otro"
+        if mensaje.text and mensaje.text.startswith("/"):
+            return mensaje.text.split()[0]
+        if mensaje.photo:
+            return "foto"
+        if mensaje.location:
+            return "ubicacion_vivo" if update.edited_message else "ubicacion"
+        return "texto" if mensaje.text else "otro"
+
+    async def process_update(self, update, coroutine):
+        chat_id = self._chat_id(update)
+        if self.ciclo is not None:
+            self.ciclo.seguir_tarea_actual(f"update {update.update_id} (chat {chat_id})")
+        traza = (self.trazador.traza("update", update_id=update.update_id, chat_id=chat_id, tipo=self._tipo(update))
+                 if self.trazador is not None else nullcontext())
+        with traza:
+            await self._procesar(update, coroutine, chat_id)
+
+    async def _procesar(self, update, coroutine, chat_id):
+        if chat_id is None:
+            await super().process_update(update, coroutine)
+            return
+
+        entrada = self._locks.get(chat_id)
+        if entrada is None:
+            entrada = self._locks[chat_id] = [asyncio.Lock(), 0]
+        entrada[1] += 1
+
+        t0 = time.perf_counter()
+        try:
+            async with entrada[0]:
+                espera = time.perf_counter() - t0
+                self._registrar_espera(chat_id, espera)
+                if self.trazador is not None:
+                    self.trazador.registrar("turno_chat", espera)
+                await super().process_update(update, coroutine)
+        finally:
+            entrada[1] -= 1
+            if entrada[1] == 0:
+                self._locks.pop(chat_id, None)
+
+    async def do_process_update(self, update, coroutine):
+        await coroutine
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def _registrar_espera(self, chat_id, espera_s: float):
+        self.esperas += 1
+        self.espera_total_s += espera_s
+        self.espera_max_s = max(self.espera_max_s, espera_s)
+        self._muestras.append(espera_s)
+        if len(self._muestras) > 2000:
+            del self._muestras[:1000]
+        if espera_s >= self.aviso_espera_s:
+            logger.warning(f"[CONCURRENCIA] Chat {chat_id} esperó {espera_s:.2f}s su turno.")
+
+    def estadisticas(self) -> dict:
+        muestras = sorted(self._muestras)
+
+        def percentil(p):
+            if not muestras:
+                return 0.0
+            return round(muestras[min(len(muestras) - 1, int(p * len(muestras)))] * 1000, 1)
+
+        return {
+            "updates": self.esperas,
+            "chats_activos": len(self._locks),
+            "espera_prom_ms": round(self.espera_total_s / self.esperas * 1000, 1) if self.esperas else 0.0,
+            "espera_p50_ms": percentil(0.50),
+            "espera_p95_ms": percentil(0.95),
+            "espera_max_ms": round(self.espera_max_s * 1000, 1),
+        }
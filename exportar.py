@@ -0,0 +1,313 @@
+"""
+Exportación masiva del historial de asistencia a Parquet o CSV comprimido.
+
+Recorre cada hoja de asistencia en ventanas de filas acotadas (un
+values().batchGet por ventana, vía auditoria.leer_columnas), tipa cada ventana
+(fechas, horas, floats para coordenadas y distancias) y la vuelca al archivo:
+un row group de Parquet o un bloque del .csv.gz por ventana. La memoria depende
+del tamaño de la ventana, no del de la hoja.
+
+Modo incremental: la marca de agua (un JSON) guarda por archivo la última fila
+exportada y la corrida siguiente empieza en la fila de abajo. Sólo se exportan
+días cerrados (FECHA anterior a --hasta, hoy por defecto) para no congelar
+filas a las que todavía les falta la HORA SALIDA. La marca se actualiza recién
+cuando el archivo de salida quedó completo.
+
+Uso como CLI:
+    python exportar.py --ssid <ID_ASISTENCIA> --ssid <ID_ORDENAMIENTO> \
+        --salida asistencia.parquet [--incremental marca_exportacion.json] \
+        [--ventana 5000] [--hasta 2025-02-01] [--formato parquet|csv]
+(requiere GOOGLE_CREDENTIALS_JSON en el entorno; Parquet requiere pyarrow)
+"""
+import os
+import sys
+import json
+import gzip
+import argparse
+import logging
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+
+import pandas as pd
+
+from auditoria import leer_columnas, SHEET_TITLE, _servicio_sheets
+from reporte import _fechas, _minutos
+
+logger = logging.getLogger(__name__)
+
+# Todas las columnas de la hoja (mismo mapa que COL en main.py)
+COLUMNAS_EXPORTACION = {
+    "ID_REGISTRO": "A",
+    "USER_ID": "B",
+    "FECHA": "C",
+    "ID_PHOENIX": "D",
+    "CUADRILLA": "E",
+    "PROVEEDOR": "F",
+    "ZONA": "G",
+    "TIPO DE CUADRILLA": "H",
+    "FOTO INICIO CUADRILLA": "I",
+    "LATITUD": "J",
+    "LONGITUD": "K",
+    "DEPARTAMENTO": "L",
+    "PROVINCIA": "M",
+    "DISTRITO": "N",
+    "HORA INGRESO": "O",
+    "HORA SALIDA": "P",
+    "FOTO FIN CUADRILLA": "Q",
+    "LATITUD SALIDA": "R",
+    "LONGITUD SALIDA": "S",
+    "DEPARTAMENTO SALIDA": "T",
+    "PROVINCIA SALIDA": "U",
+    "DISTRITO SALIDA": "V",
+    "ZONA DETECTADA": "W",
+    "DISTANCIA A ZONA (m)": "X",
+    "RECORRIDO PUNTOS": "Y",
+    "RECORRIDO KM": "Z",
+    "RECORRIDO RUTA": "AA",
+}
+
+FECHAS = ("FECHA",)
+HORAS = ("HORA INGRESO", "HORA SALIDA")
+NUMEROS = ("LATITUD", "LONGITUD", "LATITUD SALIDA", "LONGITUD SALIDA",
+           "DISTANCIA A ZONA (m)", "RECORRIDO PUNTOS", "RECORRIDO KM")
+
+# Procedencia de cada fila: archivo de origen y número de fila en la hoja
+ORIGEN = ("ARCHIVO", "FILA")
+
+VENTANA_FILAS = 5000
+
+
+# ==============================================================================
+# 🧮 TIPADO POR VENTANA (vectorizado)
+# ==============================================================================
+
+def _numeros(serie: pd.Series) -> pd.Series:
+    """Número de Sheets o texto con coma o punto decimal -> float (NaN si está vacío)."""
+    numero = pd.to_numeric(serie, errors="coerce")
+    texto = serie.astype(str).str.strip().str.replace(",", ".", regex=False)
+    return numero.fillna(pd.to_numeric(texto, errors="coerce")).astype(float)
+
+
+def _horas(serie: pd.Series) -> pd.Series:
+    """Serial (fracción de día) o 'HH:MM' -> datetime.time (None si está vacía)."""
+    minutos = _minutos(serie)
+    horas = (pd.Timestamp(0) + pd.to_timedelta(minutos % 1440, unit="m")).dt.time
+    return horas.where(minutos.notna(), None)
+
+
+def tipar(crudo: pd.DataFrame, spreadsheet_id: str, desde_fila: int) -> pd.DataFrame:
+    """
+    Ventana cruda de leer_columnas -> columnas tipadas más ARCHIVO / FILA. Las filas
+    totalmente vacías se descartan (el número de FILA de las demás se conserva).
+    """
+    df = crudo.copy()
+    df.insert(0, "FILA", range(desde_fila, desde_fila + len(df)))
+    df.insert(0, "ARCHIVO", spreadsheet_id)
+    df = df[(crudo != "").any(axis=1).to_numpy()]
+
+    for c in df.columns:
+        if c in ORIGEN:
+            continue
+        if c in FECHAS:
+            df[c] = _fechas(df[c])
+        elif c in HORAS:
+            df[c] = _horas(df[c])
+        elif c in NUMEROS:
+            df[c] = _numeros(df[c])
+        else:
+            df[c] = df[c].astype(str).str.strip()
+    return df.reset_index(drop=True)
+
+
+def leer_ventanas(sheets_service, spreadsheet_id: str, columnas: dict, desde_fila: int = 2,
+                  ventana: int = VENTANA_FILAS, sheet_title: str = SHEET_TITLE):
+    """
+    Genera (fila_inicial, ventana cruda) hasta la primera ventana vacía. Una ventana
+    incompleta no alcanza para cortar: Sheets recorta las filas vacías del final del
+    rango aunque más abajo haya datos.
+    """
+    fila = desde_fila
+    while True:
+        crudo = leer_columnas(sheets_service, spreadsheet_id, columnas, sheet_title,
+                              desde_fila=fila, hasta_fila=fila + ventana - 1)
+        if not len(crudo):
+            return
+        yield fila, crudo
+        fila += ventana
+
+
+# ==============================================================================
+# 💾 ESCRITORES (se escribe en .tmp y se renombra al cerrar sin errores)
+# ==============================================================================
+
+class _Escritor(ABC):
+    """Escribe en `ruta`.tmp y lo renombra a `ruta` sólo si la exportación terminó bien."""
+
+    def __init__(self, ruta: str, columnas: list):
+        self.ruta = ruta
+        self.temporal = ruta + ".tmp"
+        self.columnas = columnas
+        self.filas = 0
+
+    @abstractmethod
+    def escribir(self, df: pd.DataFrame):
+        """Agrega una ventana ya tipada al archivo."""
+
+    @abstractmethod
+    def _cerrar_archivo(self):
+        """Cierra el archivo temporal (antes de renombrarlo o borrarlo)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *_):
+        self._cerrar_archivo()
+        if tipo is None:
+            os.replace(self.temporal, self.ruta)
+        elif os.path.exists(self.temporal):
+            os.remove(self.temporal)
+        return False
+
+
+class EscritorParquet(_Escritor):
+    """Un row group por ventana, con esquema fijo (el de la primera ventana no manda)."""
+
+    def __init__(self, ruta: str, columnas: list):
+        super().__init__(ruta, columnas)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Exportar a Parquet requiere pyarrow (pip install pyarrow).") from e
+
+        self._pa = pa
+        tipos = {"FILA": pa.int64()}
+        tipos.update({c: pa.date32() for c in FECHAS})
+        tipos.update({c: pa.time32("s") for c in HORAS})
+        tipos.update({c: pa.float64() for c in NUMEROS})
+        self.esquema = pa.schema([(c, tipos.get(c, pa.string())) for c in columnas])
+        self._writer = pq.ParquetWriter(self.temporal, self.esquema, compression="zstd")
+
+    def escribir(self, df: pd.DataFrame):
+        tabla = self._pa.Table.from_pandas(df[self.columnas], schema=self.esquema, preserve_index=False)
+        self._writer.write_table(tabla)
+        self.filas += len(df)
+
+    def _cerrar_archivo(self):
+        self._writer.close()
+
+
+class EscritorCSV(_Escritor):
+    """CSV UTF-8 comprimido con gzip; el encabezado va una sola vez al abrir."""
+
+    def __init__(self, ruta: str, columnas: list):
+        super().__init__(ruta, columnas)
+        self._archivo = gzip.open(self.temporal, "wt", encoding="utf-8", newline="")
+        pd.DataFrame(columns=columnas).to_csv(self._archivo, index=False)
+
+    def escribir(self, df: pd.DataFrame):
+        df[self.columnas].to_csv(self._archivo, index=False, header=False)
+        self.filas += len(df)
+
+    def _cerrar_archivo(self):
+        self._archivo.close()
+
+
+def abrir_escritor(ruta: str, formato: str = None, columnas: dict = None) -> _Escritor:
+    """`formato` = "parquet" | "csv"; si no se indica, sale de la extensión de `ruta`."""
+    formato = formato or ("parquet" if ruta.endswith(".parquet") else "csv")
+    nombres = list(ORIGEN) + list(columnas or COLUMNAS_EXPORTACION)
+    return EscritorParquet(ruta, nombres) if formato == "parquet" else EscritorCSV(ruta, nombres)
+
+
+# ==============================================================================
+# 💧 MARCA DE AGUA (modo incremental)
+# ==============================================================================
+
+def leer_marca(ruta: str) -> dict:
+    """{spreadsheet_id: {"fila", "fecha", "exportado"}}; vacío si todavía no existe."""
+    if not ruta or not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f).get("archivos", {})
+
+
+def guardar_marca(ruta: str, marca: dict):
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump({"archivos": marca}, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
+
+
+# ==============================================================================
+# 🚚 EXPORTACIÓN
+# ==============================================================================
+
+def exportar(sheets_service, spreadsheet_ids, escritor: _Escritor, marca: dict = None,
+             hasta: date = None, ventana: int = VENTANA_FILAS, columnas: dict = None,
+             sheet_title: str = SHEET_TITLE) -> dict:
+    """
+    Vuelca al `escritor` las filas de cada hoja posteriores a la marca de agua y
+    anteriores a `hasta` (la primera fila con FECHA >= hasta corta esa hoja: se
+    asume que las filas se agregan en orden). Devuelve la marca nueva; `marca`
+    no se modifica.
+    """
+    columnas = columnas or COLUMNAS_EXPORTACION
+    nueva = dict(marca or {})
+    for ssid in spreadsheet_ids:
+        previa = nueva.get(ssid, {})
+        ultima_fila, ultima_fecha, filas = previa.get("fila", 1), previa.get("fecha"), 0
+
+        for inicio, crudo in leer_ventanas(sheets_service, ssid, columnas, ultima_fila + 1, ventana, sheet_title):
+            df = tipar(crudo, ssid, inicio)
+            cortar = False
+            if hasta is not None and len(df):
+                cerrados = pd.to_datetime(df["FECHA"]) < pd.Timestamp(hasta)
+                abiertos = ~cerrados & df["FECHA"].notna()
+                if abiertos.any():
+                    df, cortar = df.iloc[:int(abiertos.to_numpy().argmax())], True
+            if len(df):
+                escritor.escribir(df)
+                filas += len(df)
+                ultima_fila = int(df["FILA"].iloc[-1])
+                fechas = df["FECHA"].dropna()
+                if len(fechas):
+                    ultima_fecha = fechas.iloc[-1].isoformat()
+            logger.info(f"[EXPORTAR] {ssid}: filas {inicio}-{inicio + len(crudo) - 1} → {len(df)} exportadas")
+            if cortar:
+                break
+
+        nueva[ssid] = {
+            "fila": ultima_fila,
+            "fecha": ultima_fecha,
+            "exportado": datetime.now().isoformat(timespec="seconds"),
+        }
+        logger.info(f"[EXPORTAR] {ssid}: {filas} filas nuevas (marca en la fila {ultima_fila})")
+    return nueva
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportación del historial de asistencia (Parquet / CSV.gz)")
+    parser.add_argument("--ssid", action="append", required=True, help="ID de hoja de asistencia (repetible)")
+    parser.add_argument("--salida", required=True, help="archivo .parquet o .csv.gz")
+    parser.add_argument("--formato", choices=("parquet", "csv"), default=None)
+    parser.add_argument("--incremental", metavar="MARCA_JSON", default=None,
+                        help="exportar sólo lo posterior a la marca de agua guardada en este JSON")
+    parser.add_argument("--ventana", type=int, default=VENTANA_FILAS, help="filas por batchGet")
+    parser.add_argument("--hasta", type=date.fromisoformat, default=date.today(),
+                        help="exportar días anteriores a esta fecha (hoy por defecto)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    marca = leer_marca(args.incremental)
+    with abrir_escritor(args.salida, args.formato) as escritor:
+        nueva = exportar(_servicio_sheets(), args.ssid, escritor, marca, args.hasta, args.ventana)
+    if args.incremental:
+        guardar_marca(args.incremental, nueva)
+        print(f"💧 Marca de agua actualizada en {args.incremental}")
+    print(f"\n📦 {escritor.filas} filas exportadas a {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
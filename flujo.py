@@ -0,0 +1,106 @@
+import logging
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+logger = logging.getLogger(__name__)
+
+
+# ==============================================================================
+# 🧭 MÁQUINA DE ESTADOS DECLARATIVA DEL FLUJO DE ASISTENCIA
+# ==============================================================================
+
+# Tipos de entrada que puede esperar un paso
+ENTRADA_TEXTO = "texto"
+ENTRADA_FOTO = "foto"
+ENTRADA_UBICACION_VIVO = "ubicacion_vivo"
+ENTRADA_BOTONES = "botones"
+
+
+def tipo_entrada(message) -> str | None:
+    """Clasifica un mensaje entrante: texto, foto, ubicación (en vivo o fija)."""
+    if message is None:
+        return None
+    if message.photo:
+        return ENTRADA_FOTO
+    if message.location:
+        return ENTRADA_UBICACION_VIVO if getattr(message.location, "live_period", None) else "ubicacion"
+    if message.text:
+        return ENTRADA_TEXTO
+    return None
+
+
+class MaquinaEstados:
+    """
+    Compila una vez la tabla de pasos y transiciones a diccionarios:
+
+    - `pasos`: {paso: {"mensaje", "entrada", "botones": [[(texto, callback_data)], ...]}}
+    - `transiciones`: [{"desde": (pasos...) | None, "datos": {callback_data: paso siguiente},
+                        "accion": coroutine, "aviso": texto del answer}]
+      `desde=None` significa que la transición vale en cualquier paso; un paso
+      siguiente None deja el paso como está.
+
+    El paso siguiente lo aplica el despachador después de la acción (ver
+    `siguiente_paso`): la acción sólo hace el trabajo y avisa si no pudo.
+    `envolver(fn)` (instrumentación) se aplica una sola vez a cada acción.
+
+    Con eso, validar una entrada o un botón es una sola búsqueda en dict y los
+    teclados se construyen una sola vez al arrancar.
+    """
+
+    def __init__(self, pasos: dict, transiciones: list, envolver=None):
+        self.pasos = pasos
+        self.teclados = {
+            paso: InlineKeyboardMarkup([
+                [InlineKeyboardButton(texto, callback_data=data) for texto, data in fila]
+                for fila in conf["botones"]
+            ])
+            for paso, conf in pasos.items() if conf.get("botones")
+        }
+        self._despacho = {}
+        self._globales = {}
+        for t in transiciones:
+            accion = envolver(t["accion"]) if envolver else t["accion"]
+            for data, siguiente in t["datos"].items():
+                self._validar_paso(siguiente)
+                compilada = {"accion": accion, "aviso": t["aviso"], "siguiente": siguiente}
+                if t.get("desde") is None:
+                    self._globales[data] = compilada
+                    continue
+                for paso in t["desde"]:
+                    self._validar_boton(paso, data)
+                    self._despacho[(paso, data)] = compilada
+
+    def _validar_boton(self, paso: str, data: str):
+        botones = {d for fila in self.pasos.get(paso, {}).get("botones", []) for _, d in fila}
+        if data not in botones:
+            raise ValueError(f"Transición inválida: el paso '{paso}' no muestra el botón '{data}'")
+
+    def _validar_paso(self, paso: str | None):
+        if paso is not None and paso not in self.pasos:
+            raise ValueError(f"Transición inválida: el paso '{paso}' no existe")
+
+    def mensaje(self, paso: str) -> str | None:
+        return self.pasos.get(paso, {}).get("mensaje")
+
+    def entrada(self, paso: str) -> str | None:
+        return self.pasos.get(paso, {}).get("entrada")
+
+    def teclado(self, paso: str):
+        return self.teclados.get(paso)
+
+    def transicion(self, paso: str | None, data: str) -> dict | None:
+        """Transición para el botón `data` en el paso actual, o None si no corresponde."""
+        return self._despacho.get((paso, data)) or self._globales.get(data)
+
+    def siguiente_paso(self, transicion: dict, resultado) -> str | None:
+        """
+        Paso al que se pasa según lo que devolvió la acción:
+        None/True -> el de la tabla; False -> ninguno (se queda en el paso actual);
+        un nombre de paso -> ese (desvío, p. ej. volver a pedir un dato perdido).
+        """
+        if resultado is False:
+            return None
+        if isinstance(resultado, str):
+            self._validar_paso(resultado)
+            return resultado
+        return transicion["siguiente"]
@@ -0,0 +1,364 @@
+import json
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# numpy y shapely se importan al cargar el GeoJSON de distritos (ver _importar_shapely)
+np = shapely = shape = Point = STRtree = None
+
+
+def _importar_shapely():
+    global np, shapely, shape, Point, STRtree
+    if shapely is not None:
+        return
+    import numpy
+    import shapely as _shapely
+    from shapely.geometry import shape as _shape, Point as _Point
+    from shapely.strtree import STRtree as _STRtree
+    np, shapely, shape, Point, STRtree = numpy, _shapely, _shape, _Point, _STRtree
+
+
+# ==============================================================================
+# 🧭 GEOCODIFICADOR INVERSO LOCAL (UBIGEO departamento / provincia / distrito)
+# ==============================================================================
+
+# Nombres de propiedades aceptados (formato geogpsperu y formato INEI)
+CAMPOS_DEPARTAMENTO = ("NOMBDEP", "DEPARTAMEN", "DEPARTAMENTO")
+CAMPOS_PROVINCIA = ("NOMBPROV", "PROVINCIA")
+CAMPOS_DISTRITO = ("NOMBDIST", "DISTRITO")
+CAMPOS_UBIGEO = ("UBIGEO", "IDDIST", "CODIGO")
+
+
+def _primer_valor(props: dict, campos) -> str:
+    for campo in campos:
+        valor = props.get(campo)
+        if valor not in (None, ""):
+            return str(valor).strip()
+    return ""
+
+
+class GeocodificadorLocal:
+    """
+    Geocodificación inversa sin red sobre un GeoJSON de distritos
+    (mismo estilo que zonas.geojson, un Feature por distrito).
+
+    Las geometrías quedan preparadas y el STRtree filtra por caja,
+    así cada consulta revisa sólo 1-3 distritos candidatos.
+    """
+
+    def __init__(self, distritos: list):
+        _importar_shapely()
+        self.datos = [d for d, _ in distritos]
+        self.geometrias = np.array([shapely.force_2d(g) for _, g in distritos], dtype=object)
+        shapely.prepare(self.geometrias)
+        self.arbol = STRtree(self.geometrias)
+
+    def __len__(self):
+        return len(self.datos)
+
+    @classmethod
+    def desde_geojson(cls, ruta: str) -> "GeocodificadorLocal":
+        _importar_shapely()
+        with open(ruta, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        distritos = []
+        for feature in data.get('features', []):
+            props = feature.get('properties', {})
+            distrito = _primer_valor(props, CAMPOS_DISTRITO)
+            if not distrito or not feature.get('geometry'):
+                continue
+            datos = {
+                "departamento": _primer_valor(props, CAMPOS_DEPARTAMENTO),
+                "provincia": _primer_valor(props, CAMPOS_PROVINCIA),
+                "distrito": distrito,
+                "ubigeo": _primer_valor(props, CAMPOS_UBIGEO),
+            }
+            distritos.append((datos, shape(feature['geometry'])))
+        return cls(distritos)
+
+    def buscar(self, lat: float, lon: float) -> dict | None:
+        """
+        Devuelve {"departamento", "provincia", "distrito", "ubigeo"} del distrito
+        que contiene el punto, o None si está fuera de la cobertura.
+        """
+        for i in self.arbol.query(Point(lon, lat)):
+            if shapely.contains_xy(self.geometrias[i], lon, lat):
+                return dict(self.datos[i])
+        return None
+
+
+def cargar_geocodificador_local(ruta: str) -> GeocodificadorLocal | None:
+    """Carga el GeoJSON de distritos. Si no existe o falla, devuelve None (se usará Google)."""
+    if not ruta or not os.path.exists(ruta):
+        logger.warning(f"[GEOCODER] No se encontró '{ruta}'. Se usará sólo Google Geocoding.")
+        return None
+    try:
+        geocoder = GeocodificadorLocal.desde_geojson(ruta)
+        logger.info(f"🧭 Geocodificador local listo: {len(geocoder)} distritos desde {ruta}.")
+        return geocoder
+    except Exception as e:
+        logger.error(f"❌ Error cargando distritos ({ruta}): {e}")
+        return None
+
+
+# ==============================================================================
+# 🗃️ CACHÉ DE GEOCODIFICACIÓN POR CELDA (geohash) + SINGLEFLIGHT
+# ==============================================================================
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat: float, lon: float, precision: int = 7) -> str:
+    """
+    Geohash estándar. Tamaño aproximado de celda:
+    6 ≈ 1.2 km × 0.6 km, 7 ≈ 153 m × 153 m, 8 ≈ 38 m × 19 m.
+    """
+    lat_rango, lon_rango = [-90.0, 90.0], [-180.0, 180.0]
+    bit, ch, par = 0, 0, True
+    celda = []
+    while len(celda) < precision:
+        rango, valor = (lon_rango, lon) if par else (lat_rango, lat)
+        medio = (rango[0] + rango[1]) / 2
+        if valor >= medio:
+            ch = (ch << 1) | 1
+            rango[0] = medio
+        else:
+            ch = ch << 1
+            rango[1] = medio
+        par = not par
+        bit += 1
+        if bit == 5:
+            celda.append(_BASE32[ch])
+            bit, ch = 0, 0
+    return "".join(celda)
+
+
+class CacheGeocoding:
+    """
+    Caché de resultados de geocodificación por celda geohash.
+
+    - LRU en memoria (`max_items`) con respaldo en SQLite (`ruta_db`) que sobrevive reinicios.
+    - Singleflight: si varias tareas piden la misma celda a la vez, sólo una llama a la API
+      y el resto espera su resultado.
+    - SQLite se lee y escribe en un hilo (`asyncio.to_thread`), fuera del event loop.
+    - Resultados vacíos (error o sin datos) no se guardan.
+    """
+
+    def __init__(self, precision: int = 7, max_items: int = 5000, ruta_db: str | None = None,
+                 ttl_dias: float = 90):
+        self.precision = precision
+        self.max_items = max_items
+        self.ttl_seg = ttl_dias * 86400
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._en_vuelo_async = {}
+        self.hits = self.hits_disco = self.misses = self.coalescidas = 0
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if ruta_db:
+            try:
+                self._db = sqlite3.connect(ruta_db, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS geocache (celda TEXT PRIMARY KEY, datos TEXT, ts REAL)"
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"❌ No se pudo abrir la caché en disco ({ruta_db}): {e}")
+                self._db = None
+
+    def celda(self, lat: float, lon: float) -> str:
+        return geohash(lat, lon, self.precision)
+
+    # ---- almacenamiento ----
+
+    def _leer_memoria(self, celda: str):
+        datos = self._lru.get(celda)
+        if datos is not None:
+            self._lru.move_to_end(celda)
+        return datos
+
+    def _guardar_memoria(self, celda: str, datos: dict):
+        self._lru[celda] = datos
+        self._lru.move_to_end(celda)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    def _leer_disco(self, celda: str):
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                fila = self._db.execute(
+                    "SELECT datos, ts FROM geocache WHERE celda = ?", (celda,)
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"[GEOCACHE] Error leyendo disco: {e}")
+            return None
+        if not fila or time.time() - fila[1] > self.ttl_seg:
+            return None
+        return json.loads(fila[0])
+
+    def _guardar_disco(self, celda: str, datos: dict):
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO geocache (celda, datos, ts) VALUES (?, ?, ?)",
+                    (celda, json.dumps(datos, ensure_ascii=False), time.time()),
+                )
+                self._db.commit()
+        except Exception as e:
+            logger.warning(f"[GEOCACHE] Error escribiendo disco: {e}")
+
+    # ---- consulta ----
+
+    async def obtener_async(self, lat: float, lon: float, resolver_async) -> dict:
+        """
+        Devuelve el resultado cacheado de la celda o llama `resolver_async(lat, lon)`
+        una sola vez aunque la pidan varias tareas a la vez. La resolución corre en una
+        tarea propia: si quien espera se cancela (plazo vencido), la llamada termina igual
+        y su resultado queda en caché para los siguientes.
+        """
+        celda = self.celda(lat, lon)
+
+        with self._lock:
+            datos = self._leer_memoria(celda)
+            if datos is not None:
+                self.hits += 1
+                return dict(datos)
+
+        tarea = self._en_vuelo_async.get(celda)
+        if tarea is not None:
+            with self._lock:
+                self.coalescidas += 1
+        else:
+            tarea = asyncio.ensure_future(self._resolver_celda_async(celda, lat, lon, resolver_async))
+            self._en_vuelo_async[celda] = tarea
+            tarea.add_done_callback(lambda t: self._fin_tarea_async(celda, t))
+
+        return dict(await asyncio.shield(tarea))
+
+    def _fin_tarea_async(self, celda: str, tarea: asyncio.Future):
+        self._en_vuelo_async.pop(celda, None)
+        if not tarea.cancelled() and tarea.exception() is not None:
+            logger.warning(f"[GEOCACHE] Falló la resolución de la celda {celda}: {tarea.exception()}")
+
+    async def _resolver_celda_async(self, celda: str, lat: float, lon: float, resolver_async) -> dict:
+        datos = await asyncio.to_thread(self._leer_disco, celda) if self._db is not None else None
+        if datos is not None:
+            with self._lock:
+                self.hits_disco += 1
+                self._guardar_memoria(celda, datos)
+            return datos
+
+        with self._lock:
+            self.misses += 1
+        datos = await resolver_async(lat, lon)
+        if datos and any(datos.values()):
+            with self._lock:
+                self._guardar_memoria(celda, datos)
+            if self._db is not None:
+                await asyncio.to_thread(self._guardar_disco, celda, datos)
+        return datos
+
+    def estadisticas(self) -> dict:
+        total = self.hits + self.hits_disco + self.misses + self.coalescidas
+        ahorradas = self.hits + self.hits_disco + self.coalescidas
+        return {
+            "consultas": total,
+            "hits_memoria": self.hits,
+            "hits_disco": self.hits_disco,
+            "coalescidas": self.coalescidas,
+            "llamadas_api": self.misses,
+            "llamadas_ahorradas": ahorradas,
+            "hit_ratio": round(ahorradas / total, 4) if total else 0.0,
+            "celdas_en_memoria": len(self._lru),
+        }
+
+
+# ==============================================================================
+# 🌐 CLIENTE ASYNC DE GOOGLE GEOCODING (pool compartido + timeouts)
+# ==============================================================================
+
+GOOGLE_GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+UBICACION_VACIA = {"departamento": "", "provincia": "", "distrito": ""}
+
+
+def parsear_respuesta_google(data: dict) -> dict:
+    """Extrae departamento, provincia y distrito de una respuesta de Google Geocoding."""
+    if not data.get("results"):
+        return dict(UBICACION_VACIA)
+
+    # Buscar componentes administrativos
+    components = data["results"][0]["address_components"]
+    departamento = provincia = distrito = ""
+
+    for comp in components:
+        if "administrative_area_level_1" in comp["types"]:
+            departamento = comp["long_name"]
+        elif "administrative_area_level_2" in comp["types"]:
+            provincia = comp["long_name"]
+        elif "locality" in comp["types"] or "sublocality" in comp["types"]:
+            distrito = comp["long_name"]
+
+    return {
+        "departamento": departamento,
+        "provincia": provincia,
+        "distrito": distrito
+    }
+
+
+class ClienteGeocodingAsync:
+    """
+    Cliente de Google Geocoding sobre un único `httpx.AsyncClient` (keep-alive),
+    con timeouts de conexión/lectura y un máximo de peticiones simultáneas.
+    """
+
+    def __init__(self, api_key: str, max_concurrencia: int = 4,
+                 timeout_conexion: float = 3.0, timeout_lectura: float = 5.0):
+        self.api_key = api_key
+        self.max_concurrencia = max_concurrencia
+        self.timeout = httpx.Timeout(timeout_lectura, connect=timeout_conexion)
+        self._client = None
+        self._semaforo = None
+
+    def _cliente(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrencia,
+                    max_keepalive_connections=self.max_concurrencia,
+                    keepalive_expiry=60,
+                ),
+            )
+            self._semaforo = asyncio.Semaphore(self.max_concurrencia)
+        return self._client
+
+    async def reverse(self, lat: float, lon: float) -> dict:
+        """Geocodificación inversa. Lanza excepción ante error HTTP/red."""
+        client = self._cliente()
+        async with self._semaforo:
+            resp = await client.get(GOOGLE_GEOCODE_URL, params={
+                "latlng": f"{lat},{lon}",
+                "key": self.api_key,
+                "language": "es",
+            })
+        resp.raise_for_status()
+        return parsear_respuesta_google(resp.json())
+
+    async def cerrar(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
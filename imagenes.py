@@ -0,0 +1,141 @@
+import io
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# ==============================================================================
+# 📸 CODIFICADORES DE IMAGEN (JPEG / WEBP / libjpeg-turbo)
+# ==============================================================================
+
+CALIDAD_IMAGEN = int(os.getenv("IMAGE_QUALITY", "80"))
+
+
+class CodificadorPillowJPEG:
+    """JPEG con Pillow (comportamiento histórico del bot)."""
+    nombre = "jpeg"
+    extension = "jpg"
+    mimetype = "image/jpeg"
+
+    def __init__(self, calidad: int = CALIDAD_IMAGEN, optimize: bool = True):
+        self.calidad = calidad
+        self.optimize = optimize
+
+    def disponible(self) -> bool:
+        return True
+
+    def codificar(self, buff: io.BytesIO) -> io.BytesIO:
+        from PIL import Image  # Pillow se carga con la primera selfie, no al arrancar
+
+        salida = io.BytesIO()
+        with Image.open(buff) as img:
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            img.save(salida, format="JPEG", quality=self.calidad,
+                     optimize=self.optimize, progressive=True)
+        salida.seek(0)
+        return salida
+
+
+class CodificadorPillowWebP:
+    """WebP con Pillow: archivos más livianos en Drive a igual calidad visual."""
+    nombre = "webp"
+    extension = "webp"
+    mimetype = "image/webp"
+
+    def __init__(self, calidad: int = CALIDAD_IMAGEN, metodo: int = 4):
+        self.calidad = calidad
+        self.metodo = metodo  # 0 = rápido ... 6 = más compresión
+
+    def disponible(self) -> bool:
+        from PIL import features
+        return bool(features.check("webp"))
+
+    def codificar(self, buff: io.BytesIO) -> io.BytesIO:
+        from PIL import Image
+
+        salida = io.BytesIO()
+        with Image.open(buff) as img:
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGB")
+            img.save(salida, format="WEBP", quality=self.calidad, method=self.metodo)
+        salida.seek(0)
+        return salida
+
+
+class CodificadorTurboJPEG:
+    """
+    JPEG con libjpeg-turbo (paquete opcional PyTurboJPEG).
+    Decodifica y codifica sin pasar por Pillow cuando la entrada ya es JPEG.
+    """
+    nombre = "turbojpeg"
+    extension = "jpg"
+    mimetype = "image/jpeg"
+
+    def __init__(self, calidad: int = CALIDAD_IMAGEN):
+        self.calidad = calidad
+        self._turbo = None
+
+    def _cargar(self):
+        if self._turbo is None:
+            from turbojpeg import TurboJPEG
+            self._turbo = TurboJPEG()
+        return self._turbo
+
+    def disponible(self) -> bool:
+        try:
+            self._cargar()
+            return True
+        except Exception:
+            return False
+
+    def codificar(self, buff: io.BytesIO) -> io.BytesIO:
+        from turbojpeg import TJPF_RGB, TJSAMP_420
+
+        turbo = self._cargar()
+        datos = buff.getvalue()
+        if datos[:2] == b"\xff\xd8":
+            pixeles = turbo.decode(datos, pixel_format=TJPF_RGB)
+        else:
+            import numpy as np
+            from PIL import Image
+            with Image.open(io.BytesIO(datos)) as img:
+                pixeles = np.asarray(img.convert("RGB"))
+
+        salida = io.BytesIO(turbo.encode(
+            pixeles, quality=self.calidad, pixel_format=TJPF_RGB, jpeg_subsample=TJSAMP_420
+        ))
+        salida.seek(0)
+        return salida
+
+
+CODIFICADORES = {
+    CodificadorPillowJPEG.nombre: CodificadorPillowJPEG,
+    CodificadorPillowWebP.nombre: CodificadorPillowWebP,
+    CodificadorTurboJPEG.nombre: CodificadorTurboJPEG,
+}
+
+
+def obtener_codificador(nombre: str | None = None):
+    """
+    Devuelve el codificador configurado en IMAGE_ENCODER (jpeg | webp | turbojpeg).
+    Si no existe o no está instalado, cae a JPEG con Pillow.
+    """
+    nombre = (nombre or os.getenv("IMAGE_ENCODER", "jpeg")).strip().lower()
+    clase = CODIFICADORES.get(nombre)
+    if clase is None:
+        logger.warning(f"[IMG] Codificador '{nombre}' desconocido. Se usa JPEG (Pillow).")
+        return CodificadorPillowJPEG()
+
+    cod = clase()
+    if not cod.disponible():
+        logger.warning(f"[IMG] Codificador '{nombre}' no disponible en este entorno. Se usa JPEG (Pillow).")
+        return CodificadorPillowJPEG()
+    return cod
+
+
+def nombre_con_extension(filename: str, codificador) -> str:
+    """Ajusta la extensión del archivo a la del codificador (ej: .jpg -> .webp)."""
+    base, _ = os.path.splitext(filename)
+    return f"{base}.{codificador.extension}"
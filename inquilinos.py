@@ -0,0 +1,223 @@
+"""
+Varios bots (regiones) en un mismo proceso.
+
+Cada `Inquilino` tiene su token, sus carpetas y hojas de Drive, su archivo de
+zonas y su estado en memoria (user_data, registro_diario, vista de asistencia,
+recorridos, limitador de salida). Lo caro se comparte entre todos: clientes de
+Google, pools HTTP, executor de imágenes, geocaché e índices de zonas (uno por
+archivo, aunque lo usen varios inquilinos).
+
+El inquilino actual viaja en un ContextVar, igual que el origen de las llamadas
+(llamadas.ORIGEN_ACTUAL): main.py lo fija al entrar a cada handler y a cada job,
+y CICLO.ejecutar lo copia a los hilos del executor. Los globales de main.py que
+son de cada inquilino (user_data, VISTA_ASISTENCIA, ...) son `PorInquilino`:
+delegan en el atributo del inquilino actual y el resto del código no cambia.
+
+Archivo de configuración (INQUILINOS_CONFIG=inquilinos.json):
+    {"inquilinos": [
+        {"nombre": "lima", "bot_token_env": "BOT_TOKEN_LIMA",
+         "carpeta_principal_id": "1AbC...", "zonas_geojson": "zonas_lima.geojson",
+         "admin_ids": [123456]},
+        {"nombre": "arequipa", "bot_token_env": "BOT_TOKEN_AREQUIPA", ...}
+    ]}
+Lo que una entrada no indica se toma de la configuración de un solo bot
+(variables de entorno). El token se lee de la variable `bot_token_env` para no
+guardarlo en el archivo.
+"""
+import os
+import json
+import logging
+import contextvars
+from functools import wraps
+from contextlib import contextmanager
+
+from telegram.request import BaseRequest
+
+logger = logging.getLogger(__name__)
+
+INQUILINO_ACTUAL = contextvars.ContextVar("inquilino_actual", default=None)
+
+# Fuera de un handler o job (arranque, /metrics, benchmarks) se usa este
+_por_defecto = None
+
+
+class Inquilino:
+    """Configuración de un bot y su estado en memoria del día."""
+
+    CAMPOS = (
+        "bot_token", "carpeta_drive", "drive_id", "carpeta_principal_id",
+        "hoja_asistencia", "hoja_ordenamiento", "zonas_geojson",
+        "admin_ids", "usuarios_test", "reporte_hora", "hora_limite_ingreso", "webhook_ruta",
+    )
+
+    def __init__(self, nombre: str, **config):
+        desconocidos = set(config) - set(self.CAMPOS)
+        if desconocidos:
+            raise ValueError(f"Inquilino '{nombre}': campos desconocidos {sorted(desconocidos)}")
+        self.nombre = nombre
+        for campo in self.CAMPOS:
+            setattr(self, campo, config.get(campo))
+        self.admin_ids = set(self.admin_ids or ())
+        self.usuarios_test = set(self.usuarios_test or ())
+
+        # Estado en memoria (se vacía a medianoche)
+        self.user_data = {}
+        self.registro_diario = {}
+        self.bot_username = None
+
+    def config(self) -> dict:
+        return {campo: getattr(self, campo) for campo in self.CAMPOS}
+
+    def __repr__(self):
+        return f"<Inquilino {self.nombre}>"
+
+
+def cargar_inquilinos(ruta: str, base: Inquilino) -> list:
+    """
+    Inquilinos del archivo JSON `ruta`. Cada entrada parte de la configuración de
+    `base`; `webhook_ruta` por defecto es `<ruta de base>/<nombre>`.
+    """
+    with open(ruta, encoding="utf-8") as f:
+        entradas = json.load(f).get("inquilinos", [])
+    if not entradas:
+        raise ValueError(f"{ruta}: no define ningún inquilino")
+
+    inquilinos = []
+    for entrada in entradas:
+        entrada = dict(entrada)
+        nombre = str(entrada.pop("nombre", "")).strip()
+        if not nombre:
+            raise ValueError(f"{ruta}: hay un inquilino sin 'nombre'")
+        variable = entrada.pop("bot_token_env", None)
+        if variable:
+            entrada["bot_token"] = os.getenv(variable)
+        if not entrada.get("bot_token"):
+            raise ValueError(f"Inquilino '{nombre}': falta el token ({variable or 'bot_token_env'})")
+
+        config = base.config()
+        config["webhook_ruta"] = f"{(base.webhook_ruta or '/telegram').rstrip('/')}/{nombre}"
+        config.update(entrada)
+        config["admin_ids"] = set(config["admin_ids"] or ()) | set(config["usuarios_test"] or ())
+        inquilinos.append(Inquilino(nombre, **config))
+
+    for campo in ("nombre", "bot_token", "webhook_ruta"):
+        valores = [getattr(i, campo) for i in inquilinos]
+        if len(set(valores)) != len(valores):
+            raise ValueError(f"{ruta}: '{campo}' repetido entre inquilinos")
+    return inquilinos
+
+
+# ==============================================================================
+# 🧭 INQUILINO ACTUAL
+# ==============================================================================
+
+def fijar_por_defecto(inquilino: Inquilino):
+    global _por_defecto
+    _por_defecto = inquilino
+
+
+def inquilino_actual() -> Inquilino:
+    inquilino = INQUILINO_ACTUAL.get() or _por_defecto
+    if inquilino is None:
+        raise RuntimeError("No hay inquilino activo (falta fijar_por_defecto)")
+    return inquilino
+
+
+@contextmanager
+def en_inquilino(inquilino: Inquilino):
+    token = INQUILINO_ACTUAL.set(inquilino)
+    try:
+        yield inquilino
+    finally:
+        INQUILINO_ACTUAL.reset(token)
+
+
+def con_inquilino(inquilino: Inquilino, fn):
+    """Envuelve una coroutine function (handler o job) para que corra como `inquilino`."""
+    @wraps(fn)
+    async def envuelta(*args, **kwargs):
+        with en_inquilino(inquilino):
+            return await fn(*args, **kwargs)
+    return envuelta
+
+
+class PorInquilino:
+    """
+    Global de main.py que es de cada inquilino: `user_data = PorInquilino("user_data")`
+    se usa como el dict del inquilino actual (métodos, [], in, len, iteración).
+
+    No define métodos públicos propios: cualquier atributo, incluido `obtener` o
+    `fijar` de un `Perezoso`, llega al valor del inquilino sin que nada lo tape.
+    """
+
+    def __init__(self, atributo: str):
+        self._atributo = atributo
+
+    def _actual(self):
+        return getattr(inquilino_actual(), self._atributo)
+
+    def __getattr__(self, nombre):
+        return getattr(self._actual(), nombre)
+
+    def __getitem__(self, clave):
+        return self._actual()[clave]
+
+    def __setitem__(self, clave, valor):
+        self._actual()[clave] = valor
+
+    def __delitem__(self, clave):
+        del self._actual()[clave]
+
+    def __contains__(self, clave):
+        return clave in self._actual()
+
+    def __iter__(self):
+        return iter(self._actual())
+
+    def __len__(self):
+        return len(self._actual())
+
+    def __bool__(self):
+        return bool(self._actual())
+
+    def __repr__(self):
+        return f"<PorInquilino {self._atributo}>"
+
+
+# ==============================================================================
+# 🔌 POOL HTTP COMPARTIDO
+# ==============================================================================
+
+class RequestCompartido(BaseRequest):
+    """
+    Una sola capa HTTP (y su pool de conexiones) para los bots de todos los
+    inquilinos. Cada Application la inicializa y la cierra; el pool se cierra
+    recién cuando la cerró la última.
+    """
+
+    def __init__(self, request: BaseRequest):
+        self._request = request
+        self._usuarios = 0
+
+    @property
+    def read_timeout(self):
+        return self._request.read_timeout
+
+    async def initialize(self):
+        self._usuarios += 1
+        if self._usuarios == 1:
+            await self._request.initialize()
+
+    async def shutdown(self):
+        if self._usuarios == 0:
+            return
+        self._usuarios -= 1
+        if self._usuarios == 0:
+            await self._request.shutdown()
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        return await self._request.do_request(
+            url, method, request_data=request_data, read_timeout=read_timeout,
+            write_timeout=write_timeout, connect_timeout=connect_timeout, pool_timeout=pool_timeout,
+        )
@@ -0,0 +1,266 @@
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from datetime import timedelta
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+# ==============================================================================
+# 🚥 LIMITADOR DE MENSAJES SALIENTES (Bot API) CON PRIORIDADES
+# ==============================================================================
+
+# Menor número = sale antes
+PRIORIDAD_CRITICA = 0      # botones, confirmaciones, answerCallbackQuery
+PRIORIDAD_NORMAL = 1
+PRIORIDAD_INFORMATIVA = 2  # avisos que pueden esperar (ayuda, comandos fuera de lugar…)
+
+PRIORIDADES = {
+    "critica": PRIORIDAD_CRITICA,
+    "normal": PRIORIDAD_NORMAL,
+    "informativa": PRIORIDAD_INFORMATIVA,
+}
+
+# Sólo estos métodos envían algo a un chat y cuentan para los límites de Telegram;
+# getFile, getMe, setWebhook… pasan directo.
+PREFIJOS_LIMITADOS = ("send", "edit", "copy", "forward", "answer", "delete")
+ENDPOINTS_CRITICOS = {"answerCallbackQuery", "editMessageText", "editMessageReplyMarkup"}
+
+
+class Cubeta:
+    """Token bucket: `tasa` envíos por segundo con ráfagas de hasta `capacidad`."""
+
+    __slots__ = ("tasa", "capacidad", "fichas", "ultimo")
+
+    def __init__(self, tasa: float, capacidad: float):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.fichas = capacidad
+        self.ultimo = time.monotonic()
+
+    def _rellenar(self, ahora: float):
+        self.fichas = min(self.capacidad, self.fichas + (ahora - self.ultimo) * self.tasa)
+        self.ultimo = ahora
+
+    def espera(self, ahora: float) -> float:
+        """Segundos hasta que haya una ficha disponible (0 si ya la hay)."""
+        self._rellenar(ahora)
+        return 0.0 if self.fichas >= 1 else (1 - self.fichas) / self.tasa
+
+    def consumir(self, ahora: float):
+        self._rellenar(ahora)
+        self.fichas -= 1
+
+    def llena(self, ahora: float) -> bool:
+        self._rellenar(ahora)
+        return self.fichas >= self.capacidad
+
+
+class LimitadorSalida(BaseRateLimiter):
+    """
+    Rate limiter para PTB (`ApplicationBuilder().rate_limiter(...)`).
+
+    Cada envío espera turno en una cola de prioridad; un único despachador entrega
+    los turnos respetando el límite global del bot y el de cada chat. Si Telegram
+    responde 429, se pausa toda la salida `retry_after` segundos y se reintenta.
+
+    La prioridad se deduce del método (los botones y respuestas a callbacks son
+    críticos) o se fuerza con `rate_limit_args={"prioridad": "informativa"}`.
+    """
+
+    def __init__(self, global_por_seg: float = 25, rafaga_global: int = 30,
+                 por_chat_por_seg: float = 1.0, rafaga_chat: int = 3, max_reintentos: int = 3):
+        self.global_por_seg = global_por_seg
+        self.rafaga_global = rafaga_global
+        self.por_chat_por_seg = por_chat_por_seg
+        self.rafaga_chat = rafaga_chat
+        self.max_reintentos = max_reintentos
+
+        self._global = Cubeta(global_por_seg, rafaga_global)
+        self._chats = {}           # chat_id -> Cubeta
+        self._cola = []            # heap de (prioridad, secuencia, chat_id, future)
+        self._secuencia = itertools.count()
+        self._nuevo = None
+        self._despachador = None
+        self._pausa_hasta = 0.0
+
+        self.enviados = 0
+        self.reintentos_429 = 0
+        self._muestras = []
+
+    # ---------- ciclo de vida (lo llama Bot.initialize / Bot.shutdown) ----------
+
+    async def initialize(self):
+        # PTB lo llama dos veces (Application y Updater inicializan el mismo bot)
+        if self._despachador is not None and not self._despachador.done():
+            return
+        self._nuevo = asyncio.Event()
+        self._despachador = asyncio.create_task(self._despachar(), name="limitador_salida")
+
+    async def shutdown(self):
+        if self._despachador:
+            self._despachador.cancel()
+            try:
+                await self._despachador
+            except asyncio.CancelledError:
+                pass
+            self._despachador = None
+        # Los que quedaron esperando salen sin límite para no colgar el apagado
+        for _, _, _, fut in self._cola:
+            if not fut.done():
+                fut.set_result(None)
+        self._cola.clear()
+
+    # ---------- API de PTB ----------
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        if self._despachador is None or not endpoint.startswith(PREFIJOS_LIMITADOS):
+            return await callback(*args, **kwargs)
+
+        prioridad = self._prioridad(endpoint, data, rate_limit_args)
+        chat_id = data.get("chat_id") if endpoint != "answerCallbackQuery" else None
+
+        for intento in range(self.max_reintentos + 1):
+            await self._turno(prioridad, chat_id)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                espera = e.retry_after
+                if isinstance(espera, timedelta):
+                    espera = espera.total_seconds()
+                self.reintentos_429 += 1
+                self._pausa_hasta = max(self._pausa_hasta, time.monotonic() + float(espera))
+                logger.warning(
+                    f"[LIMITADOR] 429 en {endpoint} (chat_id={chat_id}): "
+                    f"pausa de {espera}s, intento {intento + 1}/{self.max_reintentos + 1}"
+                )
+                if intento >= self.max_reintentos:
+                    raise
+                # Una pausa 429 obliga a prioridad máxima en el reintento
+                prioridad = PRIORIDAD_CRITICA
+
+    @staticmethod
+    def _prioridad(endpoint: str, data: dict, rate_limit_args) -> int:
+        if isinstance(rate_limit_args, dict) and "prioridad" in rate_limit_args:
+            valor = rate_limit_args["prioridad"]
+            if isinstance(valor, str):
+                if valor not in PRIORIDADES:
+                    raise ValueError(f"Prioridad desconocida: '{valor}' (válidas: {', '.join(PRIORIDADES)})")
+                return PRIORIDADES[valor]
+            return int(valor)
+        if endpoint in ENDPOINTS_CRITICOS or data.get("reply_markup"):
+            return PRIORIDAD_CRITICA
+        return PRIORIDAD_NORMAL
+
+    # ---------- cola y despachador ----------
+
+    async def _turno(self, prioridad: int, chat_id):
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._cola, (prioridad, next(self._secuencia), chat_id, fut))
+        self._nuevo.set()
+        t0 = time.perf_counter()
+        await fut
+        self._registrar_espera(time.perf_counter() - t0)
+
+    def _cubeta_chat(self, chat_id):
+        cubeta = self._chats.get(chat_id)
+        if cubeta is None:
+            cubeta = self._chats[chat_id] = Cubeta(self.por_chat_por_seg, self.rafaga_chat)
+        return cubeta
+
+    def _siguiente(self, ahora: float):
+        """
+        Saca de la cola el envío de mayor prioridad cuyo chat tenga cupo.
+        Devuelve (item, espera_min) — item None si ninguno puede salir todavía.
+        """
+        aplazados = []
+        elegido, espera_min = None, None
+        while self._cola:
+            item = heapq.heappop(self._cola)
+            if item[3].done():  # cancelado mientras esperaba
+                continue
+            chat_id = item[2]
+            espera = 0.0 if chat_id is None else self._cubeta_chat(chat_id).espera(ahora)
+            if espera <= 0:
+                elegido = item
+                break
+            aplazados.append(item)
+            espera_min = espera if espera_min is None else min(espera_min, espera)
+        for item in aplazados:
+            heapq.heappush(self._cola, item)
+        return elegido, espera_min
+
+    async def _esperar(self, segundos: float | None):
+        """Duerme hasta `segundos` o hasta que llegue un envío nuevo."""
+        self._nuevo.clear()
+        try:
+            await asyncio.wait_for(self._nuevo.wait(), timeout=segundos)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _despachar(self):
+        while True:
+            try:
+                ahora = time.monotonic()
+                if ahora < self._pausa_hasta:
+                    await asyncio.sleep(self._pausa_hasta - ahora)
+                    continue
+
+                if not self._cola:
+                    self._purgar_chats(ahora)
+                    await self._esperar(None)
+                    continue
+
+                espera = self._global.espera(ahora)
+                if espera > 0:
+                    await asyncio.sleep(espera)
+                    continue
+
+                item, espera_min = self._siguiente(ahora)
+                if item is None:
+                    await self._esperar(espera_min)
+                    continue
+
+                self._global.consumir(ahora)
+                if item[2] is not None:
+                    self._chats[item[2]].consumir(ahora)
+                self.enviados += 1
+                item[3].set_result(None)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("[LIMITADOR] Error en el despachador")
+                await asyncio.sleep(0.1)
+
+    def _purgar_chats(self, ahora: float):
+        if len(self._chats) > 1000:
+            self._chats = {c: b for c, b in self._chats.items() if not b.llena(ahora)}
+
+    # ---------- métricas ----------
+
+    def _registrar_espera(self, espera_s: float):
+        self._muestras.append(espera_s)
+        if len(self._muestras) > 2000:
+            del self._muestras[:1000]
+
+    def estadisticas(self) -> dict:
+        muestras = sorted(self._muestras)
+
+        def percentil(p):
+            if not muestras:
+                return 0.0
+            return round(muestras[min(len(muestras) - 1, int(p * len(muestras)))] * 1000, 1)
+
+        return {
+            "enviados": self.enviados,
+            "en_cola": len(self._cola),
+            "reintentos_429": self.reintentos_429,
+            "espera_p50_ms": percentil(0.50),
+            "espera_p95_ms": percentil(0.95),
+            "espera_p99_ms": percentil(0.99),
+        }
@@ -0,0 +1,199 @@
+import time
+import threading
+import contextvars
+from collections import Counter
+from functools import wraps
+
+from telegram.request import BaseRequest
+
+# ==============================================================================
+# 📞 CONTABILIDAD DE LLAMADAS A APIs EXTERNAS (Google / Telegram)
+# ==============================================================================
+
+# Handler (o job) que originó la llamada. Se propaga a los hilos del executor
+# porque GestorCicloVida.ejecutar corre cada job dentro de una copia del contexto.
+ORIGEN_ACTUAL = contextvars.ContextVar("origen_llamada", default="sin_handler")
+
+
+class ContadorLlamadas:
+    """
+    Cuenta cada llamada saliente por (api, método, origen).
+
+    - Google: `instrumentar_google(servicio, "sheets")` devuelve un proxy del
+      servicio de googleapiclient; cuenta cada `.execute()` y cada `.next_chunk()`
+      (una subida resumable cuesta un round trip por fragmento).
+    - Telegram: `RequestContado(request, contador)` envuelve la capa HTTP de PTB.
+    - Cualquier otra: `envolver_async(api, metodo, fn)`.
+
+    Con `al_terminar(funcion)` se recibe además la duración y el resultado de
+    cada llamada: `funcion(api, metodo, duracion_s, error)`.
+    """
+
+    def __init__(self):
+        self._conteo = Counter()
+        self._lock = threading.Lock()  # las llamadas a Google salen desde hilos del executor
+        self._observadores = []
+
+    def registrar(self, api: str, metodo: str, origen: str = None):
+        clave = (api, metodo, origen or ORIGEN_ACTUAL.get())
+        with self._lock:
+            self._conteo[clave] += 1
+
+    def al_terminar(self, funcion):
+        self._observadores.append(funcion)
+
+    def _terminada(self, api: str, metodo: str, t0: float, error: bool):
+        duracion = time.perf_counter() - t0
+        for funcion in self._observadores:
+            try:
+                funcion(api, metodo, duracion, error)
+            except Exception:
+                pass
+
+    def medir(self, api: str, metodo: str, fn, *args, **kwargs):
+        """Cuenta y cronometra la llamada síncrona `fn(*args, **kwargs)`."""
+        self.registrar(api, metodo)
+        t0, error = time.perf_counter(), True
+        try:
+            resultado = fn(*args, **kwargs)
+            error = False
+            return resultado
+        finally:
+            self._terminada(api, metodo, t0, error)
+
+    def reiniciar(self):
+        with self._lock:
+            self._conteo.clear()
+
+    def conteo(self) -> dict:
+        """{(api, metodo, origen): n}"""
+        with self._lock:
+            return dict(self._conteo)
+
+    def por_api(self) -> dict:
+        """{api: {metodo: n}} sumando todos los orígenes."""
+        salida = {}
+        for (api, metodo, _), n in self.conteo().items():
+            salida.setdefault(api, Counter())[metodo] += n
+        return {api: dict(sorted(metodos.items())) for api, metodos in sorted(salida.items())}
+
+    def por_origen(self) -> dict:
+        """{origen: {"api.metodo": n}}"""
+        salida = {}
+        for (api, metodo, origen), n in self.conteo().items():
+            salida.setdefault(origen, Counter())[f"{api}.{metodo}"] += n
+        return {origen: dict(sorted(c.items())) for origen, c in sorted(salida.items())}
+
+    def total(self) -> int:
+        return sum(self.conteo().values())
+
+    # ---------- instrumentación ----------
+
+    def instrumentar_google(self, servicio, api: str):
+        return _RecursoContado(servicio, api, "", self)
+
+    def envolver_async(self, api: str, metodo: str, fn):
+        @wraps(fn)
+        async def envuelta(*args, **kwargs):
+            self.registrar(api, metodo)
+            t0, error = time.perf_counter(), True
+            try:
+                resultado = await fn(*args, **kwargs)
+                error = False
+                return resultado
+            finally:
+                self._terminada(api, metodo, t0, error)
+        return envuelta
+
+
+def con_origen(nombre: str, fn):
+    """Envuelve una coroutine function (handler o job) para atribuirle sus llamadas."""
+    @wraps(fn)
+    async def envuelta(*args, **kwargs):
+        token = ORIGEN_ACTUAL.set(nombre)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            ORIGEN_ACTUAL.reset(token)
+    return envuelta
+
+
+class _RecursoContado:
+    """Proxy de un recurso de googleapiclient (`service.spreadsheets().values()`…)."""
+
+    __slots__ = ("_recurso", "_api", "_ruta", "_contador")
+
+    def __init__(self, recurso, api: str, ruta: str, contador: ContadorLlamadas):
+        self._recurso = recurso
+        self._api = api
+        self._ruta = ruta
+        self._contador = contador
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self._recurso, nombre)
+        if not callable(atributo):
+            return atributo
+        ruta = f"{self._ruta}.{nombre}" if self._ruta else nombre
+
+        def llamar(*args, **kwargs):
+            resultado = atributo(*args, **kwargs)
+            if hasattr(resultado, "execute"):
+                return _PeticionContada(resultado, self._api, ruta, self._contador)
+            return _RecursoContado(resultado, self._api, ruta, self._contador)
+        return llamar
+
+
+class _PeticionContada:
+    """Proxy de un HttpRequest: la llamada se cuenta recién al ejecutarse."""
+
+    __slots__ = ("_peticion", "_api", "_metodo", "_contador")
+
+    def __init__(self, peticion, api: str, metodo: str, contador: ContadorLlamadas):
+        self._peticion = peticion
+        self._api = api
+        self._metodo = metodo
+        self._contador = contador
+
+    def execute(self, *args, **kwargs):
+        return self._contador.medir(self._api, self._metodo, self._peticion.execute, *args, **kwargs)
+
+    def next_chunk(self, *args, **kwargs):
+        return self._contador.medir(self._api, self._metodo, self._peticion.next_chunk, *args, **kwargs)
+
+    def __getattr__(self, nombre):
+        return getattr(self._peticion, nombre)
+
+
+class RequestContado(BaseRequest):
+    """Capa HTTP de PTB que cuenta cada llamada al Bot API antes de delegarla."""
+
+    def __init__(self, request: BaseRequest, contador: ContadorLlamadas, api: str = "telegram"):
+        self._request = request
+        self._contador = contador
+        self._api = api
+
+    @property
+    def read_timeout(self):
+        return self._request.read_timeout
+
+    async def initialize(self):
+        await self._request.initialize()
+
+    async def shutdown(self):
+        await self._request.shutdown()
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        # .../bot<token>/sendMessage → sendMessage; .../file/bot<token>/<ruta> → descarga
+        metodo = "descargarArchivo" if "/file/bot" in url else url.rsplit("/", 1)[-1]
+        self._contador.registrar(self._api, metodo)
+        t0, error = time.perf_counter(), True
+        try:
+            codigo, contenido = await self._request.do_request(
+                url, method, request_data=request_data, read_timeout=read_timeout,
+                write_timeout=write_timeout, connect_timeout=connect_timeout, pool_timeout=pool_timeout,
+            )
+            error = codigo >= 400  # PTB convierte 4xx/5xx en excepción después
+            return codigo, contenido
+        finally:
+            self._contador._terminada(self._api, metodo, t0, error)
@@ -0,0 +1,194 @@
+"""
+Registro de métricas en formato de texto de Prometheus (sin dependencias extra).
+
+- Contador / Medidor / Histograma con etiquetas; seguros entre hilos (las llamadas
+  a Google salen desde el executor).
+- Un Medidor o Contador puede leerse de una función al momento del scrape
+  (`funcion=`), para exponer estadísticas que ya llevan otros componentes.
+- `RegistroMetricas.manejar` es un handler aiohttp para GET /metrics;
+  `iniciar_servidor_metricas` levanta un servidor propio (modo polling).
+  aiohttp se importa recién ahí: registrar y actualizar métricas no lo necesita.
+"""
+import math
+import time
+import logging
+import threading
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(nombres: tuple, valores: tuple, extra: str = "") -> str:
+    partes = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Metrica:
+    tipo = "untyped"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = (), funcion=None):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.funcion = funcion
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _clave(self, etiquetas: dict) -> tuple:
+        if set(etiquetas) != set(self.etiquetas):
+            raise ValueError(f"{self.nombre}: etiquetas {sorted(etiquetas)} != {sorted(self.etiquetas)}")
+        return tuple(str(etiquetas[e]) for e in self.etiquetas)
+
+    def _muestras(self) -> dict:
+        """{valores de etiquetas: valor}. Con `funcion`, la función devuelve un número o ese dict."""
+        if self.funcion is None:
+            with self._lock:
+                return dict(self._valores)
+        try:
+            leido = self.funcion()
+        except Exception as e:
+            logger.warning(f"[METRICAS] No se pudo leer {self.nombre}: {e!r}")
+            return {}
+        if isinstance(leido, dict):
+            return {k if isinstance(k, tuple) else (k,): v for k, v in leido.items()}
+        return {(): leido}
+
+    def exponer(self) -> list:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        for valores, valor in sorted(self._muestras().items()):
+            lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {_numero(valor)}")
+        return lineas
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def inc(self, cantidad: float = 1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + cantidad
+
+
+class Medidor(_Metrica):
+    tipo = "gauge"
+
+    def fijar(self, valor: float, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = valor
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = (), buckets: tuple = BUCKETS_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observar(self, valor: float, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            serie = self._valores.get(clave)
+            if serie is None:
+                serie = self._valores[clave] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+                    break
+            serie[1] += valor
+            serie[2] += 1
+
+    def cronometrar(self, fn, errores: Contador = None, **etiquetas):
+        """Envuelve una coroutine function: observa su duración y cuenta las excepciones."""
+        @wraps(fn)
+        async def envuelta(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                if errores is not None:
+                    errores.inc(**etiquetas)
+                raise
+            finally:
+                self.observar(time.perf_counter() - t0, **etiquetas)
+        return envuelta
+
+    def exponer(self) -> list:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        with self._lock:
+            series = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._valores.items())
+        for valores, (conteos, suma, total) in series:
+            acumulado = 0
+            for limite, n in zip(self.buckets, conteos):
+                acumulado += n
+                le = f'le="{_numero(limite)}"'
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, le)} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {total}")
+        return lineas
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas = {}
+
+    def _registrar(self, metrica: _Metrica) -> _Metrica:
+        if metrica.nombre in self._metricas:
+            raise ValueError(f"Métrica duplicada: {metrica.nombre}")
+        self._metricas[metrica.nombre] = metrica
+        return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: tuple = (), funcion=None) -> Contador:
+        return self._registrar(Contador(nombre, ayuda, etiquetas, funcion))
+
+    def medidor(self, nombre: str, ayuda: str, etiquetas: tuple = (), funcion=None) -> Medidor:
+        return self._registrar(Medidor(nombre, ayuda, etiquetas, funcion))
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: tuple = (),
+                   buckets: tuple = BUCKETS_SEGUNDOS) -> Histograma:
+        return self._registrar(Histograma(nombre, ayuda, etiquetas, buckets))
+
+    def exponer(self) -> str:
+        lineas = []
+        for metrica in self._metricas.values():
+            lineas.extend(metrica.exponer())
+        return "\n".join(lineas) + "\n"
+
+    async def manejar(self, request: "web.Request") -> "web.Response":
+        from aiohttp import web
+
+        return web.Response(body=self.exponer().encode("utf-8"), headers={"Content-Type": TIPO_CONTENIDO})
+
+
+async def iniciar_servidor_metricas(registro: RegistroMetricas, puerto: int, host: str = "127.0.0.1",
+                                    rutas: dict = None) -> "web.AppRunner":
+    """
+    Servidor aiohttp con GET /metrics (y las `rutas` extra {ruta: handler}, también GET).
+    Se detiene con `await runner.cleanup()`.
+    """
+    from aiohttp import web
+
+    web_app = web.Application()
+    web_app.router.add_get("/metrics", registro.manejar)
+    for ruta, handler in (rutas or {}).items():
+        web_app.router.add_get(ruta, handler)
+    runner = web.AppRunner(web_app)
+    await runner.setup()
+    await web.TCPSite(runner, host, puerto).start()
+    logger.info(f"📈 [METRICAS] Escuchando en {host}:{puerto}/metrics")
+    return runner
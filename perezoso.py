@@ -0,0 +1,49 @@
+import threading
+
+# ==============================================================================
+# 💤 CARGA PEREZOSA (dependencias pesadas fuera del arranque)
+# ==============================================================================
+
+
+class Perezoso:
+    """
+    Valor que se construye recién en el primer uso, una sola vez aunque lo pidan
+    varios hilos a la vez (las llamadas a Google salen desde el executor).
+
+    - `obtener()` devuelve el valor (lo construye si hace falta).
+    - Los atributos se delegan al valor, así un servicio de googleapiclient
+      perezoso se usa igual que el original: `drive_service.files().list(...)`.
+    - Si la fábrica falla, la excepción sube y el próximo uso vuelve a intentar.
+    """
+
+    def __init__(self, fabrica, nombre: str = ""):
+        self._fabrica = fabrica
+        self._nombre = nombre or getattr(fabrica, "__name__", "perezoso")
+        self._valor = None
+        self._cargado = False
+        self._lock = threading.Lock()
+
+    @property
+    def cargado(self) -> bool:
+        return self._cargado
+
+    def obtener(self):
+        if not self._cargado:
+            with self._lock:
+                if not self._cargado:
+                    self._valor = self._fabrica()
+                    self._cargado = True
+        return self._valor
+
+    def fijar(self, valor):
+        """Usa `valor` sin llamar a la fábrica (p. ej. ya se obtuvo por otro camino)."""
+        with self._lock:
+            self._valor = valor
+            self._cargado = True
+
+    def __getattr__(self, nombre):
+        return getattr(self.obtener(), nombre)
+
+    def __repr__(self):
+        estado = "cargado" if self._cargado else "sin cargar"
+        return f"<Perezoso {self._nombre} ({estado})>"
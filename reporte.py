@@ -0,0 +1,264 @@
+"""
+Reporte diario de asistencia en Excel.
+
+Lee las filas del día de las hojas de asistencia (un solo batchGet por archivo,
+vía auditoria.leer_columnas), calcula en bloque presentes, tardanzas, salidas
+sin marcar y horas promedio por zona, proveedor y tipo de cuadrilla, y escribe
+un .xlsx con openpyxl en modo write-only (las filas se van volcando, sin armar
+el libro completo en memoria).
+
+Uso como CLI:
+    python reporte.py --ssid <ID_ASISTENCIA> --ssid <ID_ORDENAMIENTO> \
+        [--fecha 2025-01-31] [--hora-limite 08:00] [--salida reporte.xlsx]
+(requiere GOOGLE_CREDENTIALS_JSON en el entorno)
+"""
+import io
+import sys
+import argparse
+import logging
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from auditoria import leer_columnas, EPOCA_SHEETS, _servicio_sheets
+
+logger = logging.getLogger(__name__)
+
+# Columnas que usa el reporte (mismo mapa que COL en main.py)
+COLUMNAS_REPORTE = {
+    "FECHA": "C",
+    "ID_PHOENIX": "D",
+    "CUADRILLA": "E",
+    "PROVEEDOR": "F",
+    "ZONA": "G",
+    "TIPO DE CUADRILLA": "H",
+    "HORA INGRESO": "O",
+    "HORA SALIDA": "P",
+}
+
+HORA_LIMITE_POR_DEFECTO = "08:00"
+
+# Hoja del Excel -> columnas por las que se agrupa
+AGRUPACIONES = {
+    "Por zona": ["ZONA"],
+    "Por proveedor": ["PROVEEDOR"],
+    "Por tipo": ["TIPO DE CUADRILLA"],
+}
+
+COLUMNAS_RESUMEN = ["REGISTROS", "PRESENTES", "TARDANZAS", "SIN SALIDA", "HORAS PROMEDIO", "% PUNTUALIDAD"]
+COLUMNAS_DETALLE = ["ID_PHOENIX", "CUADRILLA", "PROVEEDOR", "ZONA", "TIPO DE CUADRILLA",
+                    "HORA INGRESO", "HORA SALIDA", "HORAS", "ESTADO"]
+
+PUNTUAL, TARDE, SIN_INGRESO = "PUNTUAL", "TARDE", "SIN INGRESO"
+
+
+# ==============================================================================
+# 🧮 CONVERSIONES VECTORIZADAS (seriales de Sheets o texto)
+# ==============================================================================
+
+def _fechas(serie: pd.Series) -> pd.Series:
+    """Serial de fecha (días desde 1899-12-30) o texto 'YYYY-MM-DD' -> date (None si no se entiende)."""
+    numero = pd.to_numeric(serie, errors="coerce")
+    desde_serial = pd.to_datetime(numero, unit="D", origin=pd.Timestamp(EPOCA_SHEETS))
+    desde_texto = pd.to_datetime(serie.astype(str).str.strip(), format="%Y-%m-%d", errors="coerce")
+    fechas = desde_serial.where(numero.notna(), desde_texto)
+    return fechas.dt.date.where(fechas.notna(), None)
+
+
+def _minutos(serie: pd.Series) -> pd.Series:
+    """Hora del día en minutos: serial (fracción de día) o texto 'HH:MM'. NaN si está vacía."""
+    numero = pd.to_numeric(serie, errors="coerce")
+    partes = serie.astype(str).str.extract(r"^\s*(\d{1,2}):(\d{2})")
+    desde_texto = partes[0].astype(float) * 60 + partes[1].astype(float)
+    return ((numero % 1) * 1440).round().where(numero.notna(), desde_texto)
+
+
+def _a_hhmm(minutos: pd.Series) -> pd.Series:
+    m = minutos.round()
+    texto = (m // 60).astype("Int64").astype(str).str.zfill(2) + ":" + (m % 60).astype("Int64").astype(str).str.zfill(2)
+    return texto.where(minutos.notna(), "")
+
+
+def _minutos_de(hhmm: str) -> int:
+    horas, minutos = hhmm.strip().split(":")
+    return int(horas) * 60 + int(minutos)
+
+
+# ==============================================================================
+# 📊 CÁLCULO
+# ==============================================================================
+
+def preparar_dia(df: pd.DataFrame, fecha: date, hora_limite: str = HORA_LIMITE_POR_DEFECTO) -> pd.DataFrame:
+    """Filas de `fecha` con las columnas calculadas PRESENTE, TARDANZA, SIN SALIDA, HORAS y ESTADO."""
+    df = df[_fechas(df["FECHA"]) == fecha].copy()
+    for c in ("ID_PHOENIX", "CUADRILLA", "PROVEEDOR", "ZONA", "TIPO DE CUADRILLA"):
+        df[c] = df[c].astype(str).str.strip()
+
+    ingreso = _minutos(df["HORA INGRESO"])
+    salida = _minutos(df["HORA SALIDA"])
+    df["PRESENTE"] = ingreso.notna()
+    df["TARDANZA"] = ingreso > _minutos_de(hora_limite)
+    df["SIN SALIDA"] = df["PRESENTE"] & salida.isna()
+    horas = (salida - ingreso) / 60
+    df["HORAS"] = horas.where(horas >= 0).round(2)
+    df["ESTADO"] = np.select([~df["PRESENTE"], df["TARDANZA"]], [SIN_INGRESO, TARDE], PUNTUAL)
+    df["HORA INGRESO"] = _a_hhmm(ingreso)
+    df["HORA SALIDA"] = _a_hhmm(salida)
+    return df
+
+
+def agregar(dia: pd.DataFrame, por: list) -> pd.DataFrame:
+    """Presentes, tardanzas, salidas sin marcar y horas promedio por grupo."""
+    resumen = dia.groupby(por, dropna=False).agg(
+        REGISTROS=("PRESENTE", "size"),
+        PRESENTES=("PRESENTE", "sum"),
+        TARDANZAS=("TARDANZA", "sum"),
+        SIN_SALIDA=("SIN SALIDA", "sum"),
+        HORAS_PROMEDIO=("HORAS", "mean"),
+    ).rename(columns={"SIN_SALIDA": "SIN SALIDA", "HORAS_PROMEDIO": "HORAS PROMEDIO"})
+    presentes = resumen["PRESENTES"].where(resumen["PRESENTES"] > 0)
+    resumen["% PUNTUALIDAD"] = (100 * (resumen["PRESENTES"] - resumen["TARDANZAS"]) / presentes).round(1)
+    resumen["HORAS PROMEDIO"] = resumen["HORAS PROMEDIO"].round(2)
+    return resumen.reset_index().sort_values(por)[por + COLUMNAS_RESUMEN]
+
+
+def totales(dia: pd.DataFrame) -> dict:
+    presentes = int(dia["PRESENTE"].sum())
+    tardanzas = int(dia["TARDANZA"].sum())
+    horas = dia["HORAS"].mean()
+    return {
+        "registros": len(dia),
+        "cuadrillas": int(dia["ID_PHOENIX"].nunique()),
+        "presentes": presentes,
+        "tardanzas": tardanzas,
+        "sin_salida": int(dia["SIN SALIDA"].sum()),
+        "horas_promedio": None if pd.isna(horas) else round(float(horas), 2),
+        "puntualidad": round(100 * (presentes - tardanzas) / presentes, 1) if presentes else None,
+    }
+
+
+def calcular_reporte(df: pd.DataFrame, fecha: date, hora_limite: str = HORA_LIMITE_POR_DEFECTO) -> dict:
+    """{"fecha", "hora_limite", "totales", "hojas": {nombre: DataFrame}} listo para `escribir_xlsx`."""
+    dia = preparar_dia(df, fecha, hora_limite)
+    hojas = {nombre: agregar(dia, por) for nombre, por in AGRUPACIONES.items()}
+    hojas["Detalle"] = dia.sort_values(["ZONA", "PROVEEDOR", "HORA INGRESO"])[COLUMNAS_DETALLE]
+    return {"fecha": fecha, "hora_limite": hora_limite, "totales": totales(dia), "hojas": hojas}
+
+
+def generar_reporte(sheets_service, spreadsheet_ids, fecha: date,
+                    hora_limite: str = HORA_LIMITE_POR_DEFECTO, columnas: dict = None) -> dict:
+    """Lee las hojas (un batchGet por archivo) y calcula el reporte de `fecha`."""
+    columnas = columnas or COLUMNAS_REPORTE
+    marcos = [leer_columnas(sheets_service, ssid, columnas) for ssid in spreadsheet_ids if ssid]
+    df = pd.concat(marcos, ignore_index=True) if marcos else pd.DataFrame(columns=list(columnas))
+    reporte = calcular_reporte(df, fecha, hora_limite)
+    logger.info(f"[REPORTE] {fecha}: {reporte['totales']}")
+    return reporte
+
+
+# ==============================================================================
+# 📗 EXCEL (openpyxl write-only)
+# ==============================================================================
+
+ANCHOS = {"ZONA": 18, "PROVEEDOR": 22, "TIPO DE CUADRILLA": 20, "CUADRILLA": 28, "ID_PHOENIX": 12}
+FORMATOS = {"HORAS PROMEDIO": "0.00", "HORAS": "0.00", "% PUNTUALIDAD": "0.0"}
+
+ETIQUETAS_TOTALES = {
+    "registros": "Registros",
+    "cuadrillas": "Cuadrillas",
+    "presentes": "Presentes",
+    "tardanzas": "Tardanzas",
+    "sin_salida": "Sin hora de salida",
+    "horas_promedio": "Horas promedio",
+    "puntualidad": "% Puntualidad",
+}
+
+
+def _celda(hoja, valor, fuente=None, relleno=None, formato=None):
+    if isinstance(valor, (float, np.floating)) and np.isnan(valor):
+        valor = None
+    elif isinstance(valor, np.generic):
+        valor = valor.item()
+    celda = WriteOnlyCell(hoja, value=valor)
+    if fuente is not None:
+        celda.font = fuente
+    if relleno is not None:
+        celda.fill = relleno
+    if formato is not None:
+        celda.number_format = formato
+    return celda
+
+
+def escribir_xlsx(reporte: dict) -> bytes:
+    """Libro con la hoja Resumen, una hoja por agrupación y el Detalle del día."""
+    negrita = Font(bold=True, color="FFFFFF")
+    cabecera = PatternFill("solid", fgColor="1F4E78")
+    titulo = Font(bold=True, size=14)
+
+    libro = Workbook(write_only=True)
+
+    hoja = libro.create_sheet("Resumen")
+    hoja.column_dimensions["A"].width = 24
+    hoja.column_dimensions["B"].width = 14
+    hoja.append([_celda(hoja, f"Asistencia del {reporte['fecha']}", fuente=titulo)])
+    hoja.append([f"Tardanza: ingreso después de las {reporte['hora_limite']}"])
+    hoja.append([])
+    for clave, etiqueta in ETIQUETAS_TOTALES.items():
+        hoja.append([etiqueta, _celda(hoja, reporte["totales"][clave])])
+
+    for nombre, df in reporte["hojas"].items():
+        hoja = libro.create_sheet(nombre)
+        hoja.freeze_panes = "A2"
+        for i, columna in enumerate(df.columns, start=1):
+            hoja.column_dimensions[get_column_letter(i)].width = ANCHOS.get(columna, max(12, len(columna) + 2))
+        hoja.append([_celda(hoja, c, fuente=negrita, relleno=cabecera) for c in df.columns])
+        formatos = [FORMATOS.get(c) for c in df.columns]
+        for fila in df.itertuples(index=False, name=None):
+            hoja.append([_celda(hoja, v, formato=f) for v, f in zip(fila, formatos)])
+
+    salida = io.BytesIO()
+    libro.save(salida)
+    return salida.getvalue()
+
+
+def resumen_texto(reporte: dict) -> str:
+    """Resumen corto (HTML de Telegram) para acompañar el archivo."""
+    t = reporte["totales"]
+    horas = "-" if t["horas_promedio"] is None else f"{t['horas_promedio']:.2f}"
+    puntualidad = "-" if t["puntualidad"] is None else f"{t['puntualidad']:.1f}%"
+    return (
+        f"📊 <b>Asistencia del {reporte['fecha']}</b>\n"
+        f"👷 Presentes: <b>{t['presentes']}</b> de {t['registros']} registros ({t['cuadrillas']} cuadrillas)\n"
+        f"⏰ Tardanzas (después de {reporte['hora_limite']}): <b>{t['tardanzas']}</b> · Puntualidad {puntualidad}\n"
+        f"🚪 Sin hora de salida: <b>{t['sin_salida']}</b>\n"
+        f"🕒 Horas promedio: <b>{horas}</b>"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reporte diario de asistencia (xlsx)")
+    parser.add_argument("--ssid", action="append", required=True, help="ID de hoja de asistencia (repetible)")
+    parser.add_argument("--fecha", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--hora-limite", default=HORA_LIMITE_POR_DEFECTO)
+    parser.add_argument("--salida", default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    reporte = generar_reporte(_servicio_sheets(), args.ssid, args.fecha, args.hora_limite)
+    salida = args.salida or f"reporte_asistencia_{args.fecha}.xlsx"
+    with open(salida, "wb") as f:
+        f.write(escribir_xlsx(reporte))
+    for nombre, df in reporte["hojas"].items():
+        if nombre != "Detalle":
+            print(f"\n== {nombre} ==\n{df.to_string(index=False)}")
+    print(f"\n🧾 Reporte guardado en {salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+Presupuesto de llamadas externas por asistencia (ver benchmarks/presupuesto.py).
+
+Un flujo completo por tipo de cuadrilla contra los dobles de benchmarks/carga.py:
+cualquier llamada de más o de menos a Sheets, Drive, Geocoding o Telegram hace
+fallar el test. Si el cambio es intencional, se actualiza PRESUPUESTO en el mismo
+commit (`python -m benchmarks.presupuesto --detalle` muestra el detalle por handler).
+"""
+import os
+import sys
+import asyncio
+import logging
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.presupuesto import PRESUPUESTO, comparar, medir  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def resultados():
+    logging.disable(logging.WARNING)
+    try:
+        return asyncio.run(medir())
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+@pytest.mark.parametrize("tipo", sorted(PRESUPUESTO))
+def test_presupuesto_por_asistencia(resultados, tipo):
+    r = resultados[tipo]
+    assert r["completo"], f"{tipo}: el flujo no se completó"
+
+    diferencias = comparar(PRESUPUESTO[tipo], r["llamadas"])
+    detalle = "\n".join(
+        f"  {llamada}: esperado {esperado}, medido {medido} ({medido - esperado:+d})"
+        for llamada, esperado, medido in diferencias
+    )
+    assert not diferencias, f"{tipo}: llamadas fuera de presupuesto\n{detalle}\npor handler: {r['por_origen']}"
@@ -0,0 +1,373 @@
+"""
+Trazas livianas por update: una traza por update de Telegram con spans hijos para
+cada llamada externa (Telegram, Sheets, Drive, Geocoding) y las etapas de CPU
+(compresión de la selfie, chequeo de zona).
+
+Se exportan en segundo plano a un JSONL local (una línea por traza) y/o a un
+collector OTLP/HTTP (JSON). Para ver las más lentas con su cascada de spans:
+
+    python trazas.py lentas trazas.jsonl --top 10 [--min-ms 2000] [--nombre update]
+    python trazas.py ver trazas.jsonl <trace_id>
+"""
+import os
+import sys
+import json
+import time
+import heapq
+import queue
+import logging
+import argparse
+import threading
+import contextvars
+from datetime import datetime
+from functools import wraps
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Span abierto en la tarea (o hilo del executor, que hereda una copia del contexto)
+SPAN_ACTUAL = contextvars.ContextVar("span_actual", default=None)
+
+
+def _id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+class _Span:
+    __slots__ = ("traza", "trace_id", "id", "padre", "nombre", "inicio_ns", "t0", "atributos", "error")
+
+    def __init__(self, traza: list, trace_id: str, padre, nombre: str, atributos: dict):
+        self.traza = traza  # lista compartida de spans terminados de la traza
+        self.trace_id = trace_id
+        self.id = _id(8)
+        self.padre = padre
+        self.nombre = nombre
+        self.inicio_ns = time.time_ns()
+        self.t0 = time.perf_counter()
+        self.atributos = atributos
+        self.error = None
+
+    def fijar(self, **atributos):
+        self.atributos.update(atributos)
+
+    def cerrar(self) -> dict:
+        registro = {
+            "span_id": self.id,
+            "padre": self.padre,
+            "nombre": self.nombre,
+            "inicio_ns": self.inicio_ns,
+            "dur_ms": round((time.perf_counter() - self.t0) * 1000, 2),
+            "atributos": self.atributos,
+            "error": self.error,
+        }
+        self.traza.append(registro)
+        return registro
+
+
+class Trazador:
+    """
+    `traza()` abre la raíz (una por update); `span()`, `envolver()` y `registrar()`
+    cuelgan spans del span actual. Sin traza abierta, todo es no-op.
+    """
+
+    def __init__(self, exportadores=(), umbral_ms: float = 0, max_spans: int = 500, max_cola: int = 1000):
+        self.exportadores = list(exportadores)
+        self.umbral_ms = umbral_ms
+        self.max_spans = max_spans
+        self.exportadas = 0
+        self.descartadas = 0
+        self._cola = queue.Queue(maxsize=max_cola)
+        self._hilo = None
+        if self.exportadores:
+            self._hilo = threading.Thread(target=self._exportar, name="trazas", daemon=True)
+            self._hilo.start()
+
+    @property
+    def activo(self) -> bool:
+        return bool(self.exportadores)
+
+    # ---------- spans ----------
+
+    @contextmanager
+    def traza(self, nombre: str, **atributos):
+        if not self.activo:
+            yield None
+            return
+        trace_id = _id(16)
+        spans = []
+        raiz = _Span(spans, trace_id, None, nombre, atributos)
+        token = SPAN_ACTUAL.set(raiz)
+        try:
+            yield raiz
+        except BaseException as e:
+            raiz.error = repr(e)
+            raise
+        finally:
+            SPAN_ACTUAL.reset(token)
+            registro = raiz.cerrar()
+            self._terminar(trace_id, registro, spans)
+
+    @contextmanager
+    def span(self, nombre: str, **atributos):
+        padre = SPAN_ACTUAL.get()
+        if padre is None or len(padre.traza) >= self.max_spans:
+            yield None
+            return
+        span = _Span(padre.traza, padre.trace_id, padre.id, nombre, atributos)
+        token = SPAN_ACTUAL.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            SPAN_ACTUAL.reset(token)
+            span.cerrar()
+
+    def envolver(self, nombre: str, fn):
+        """Coroutine function dentro de un span."""
+        @wraps(fn)
+        async def envuelta(*args, **kwargs):
+            with self.span(nombre):
+                return await fn(*args, **kwargs)
+        return envuelta
+
+    def registrar(self, nombre: str, duracion_s: float, error: bool = False, **atributos):
+        """Span ya terminado (se conoce sólo su duración), hijo del span actual."""
+        padre = SPAN_ACTUAL.get()
+        if padre is None or len(padre.traza) >= self.max_spans:
+            return
+        padre.traza.append({
+            "span_id": _id(8),
+            "padre": padre.id,
+            "nombre": nombre,
+            "inicio_ns": time.time_ns() - int(duracion_s * 1e9),
+            "dur_ms": round(duracion_s * 1000, 2),
+            "atributos": atributos,
+            "error": "error" if error else None,
+        })
+
+    def registrar_llamada(self, api: str, metodo: str, duracion_s: float, error: bool):
+        """Observador para ContadorLlamadas.al_terminar."""
+        self.registrar(f"{api}.{metodo}", duracion_s, error, api=api)
+
+    # ---------- exportación ----------
+
+    def _terminar(self, trace_id: str, raiz: dict, spans: list):
+        if raiz["dur_ms"] < self.umbral_ms:
+            return
+        traza = {
+            "trace_id": trace_id,
+            "nombre": raiz["nombre"],
+            "inicio_ns": raiz["inicio_ns"],
+            "dur_ms": raiz["dur_ms"],
+            "error": raiz["error"],
+            "atributos": raiz["atributos"],
+            "spans": sorted(spans, key=lambda s: s["inicio_ns"]),
+        }
+        try:
+            self._cola.put_nowait(traza)
+        except queue.Full:
+            self.descartadas += 1
+
+    def _exportar(self):
+        while True:
+            traza = self._cola.get()
+            if traza is None:
+                return
+            for exportador in self.exportadores:
+                try:
+                    exportador.exportar(traza)
+                except Exception as e:
+                    logger.warning(f"[TRAZAS] {type(exportador).__name__} falló: {e!r}")
+            self.exportadas += 1
+
+    def cerrar(self, timeout: float = 5.0):
+        """Exporta lo que quedó en cola (hasta `timeout` s) y cierra los exportadores."""
+        if self._hilo is None:
+            return
+        try:
+            self._cola.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._hilo.join(timeout)
+        for exportador in self.exportadores:
+            try:
+                exportador.cerrar()
+            except Exception:
+                pass
+        self._hilo = None
+
+    def estadisticas(self) -> dict:
+        return {"exportadas": self.exportadas, "en_cola": self._cola.qsize(), "descartadas": self.descartadas}
+
+
+class ExportadorJSONL:
+    """Una traza por línea; al pasar `max_mb` rota a `<ruta>.1` (se conserva una sola copia)."""
+
+    def __init__(self, ruta: str, max_mb: float = 20):
+        self.ruta = ruta
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+    def exportar(self, traza: dict):
+        try:
+            if os.path.getsize(self.ruta) >= self.max_bytes:
+                os.replace(self.ruta, self.ruta + ".1")
+        except OSError:
+            pass
+        with open(self.ruta, "a", encoding="utf-8") as f:
+            f.write(json.dumps(traza, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def cerrar(self):
+        pass
+
+
+class ExportadorOTLP:
+    """POST a un collector OTLP/HTTP con codificación JSON (`<url>/v1/traces`)."""
+
+    def __init__(self, url: str, servicio: str = "bot-asistencia", timeout: float = 5.0):
+        import httpx
+
+        self.url = url.rstrip("/") if url.rstrip("/").endswith("/v1/traces") else url.rstrip("/") + "/v1/traces"
+        self.servicio = servicio
+        self._cliente = httpx.Client(timeout=timeout)
+
+    @staticmethod
+    def _atributos(atributos: dict) -> list:
+        salida = []
+        for clave, valor in atributos.items():
+            if isinstance(valor, bool):
+                salida.append({"key": clave, "value": {"boolValue": valor}})
+            elif isinstance(valor, int):
+                salida.append({"key": clave, "value": {"intValue": str(valor)}})
+            elif isinstance(valor, float):
+                salida.append({"key": clave, "value": {"doubleValue": valor}})
+            else:
+                salida.append({"key": clave, "value": {"stringValue": str(valor)}})
+        return salida
+
+    def _span(self, trace_id: str, s: dict) -> dict:
+        span = {
+            "traceId": trace_id,
+            "spanId": s["span_id"],
+            "name": s["nombre"],
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(s["inicio_ns"]),
+            "endTimeUnixNano": str(s["inicio_ns"] + int(s["dur_ms"] * 1e6)),
+            "attributes": self._atributos(s["atributos"]),
+            "status": {"code": 2, "message": s["error"]} if s["error"] else {"code": 1},
+        }
+        if s["padre"]:
+            span["parentSpanId"] = s["padre"]
+        return span
+
+    def exportar(self, traza: dict):
+        cuerpo = {"resourceSpans": [{
+            "resource": {"attributes": self._atributos({"service.name": self.servicio})},
+            "scopeSpans": [{
+                "scope": {"name": "trazas"},
+                "spans": [self._span(traza["trace_id"], s) for s in traza["spans"]],
+            }],
+        }]}
+        resp = self._cliente.post(self.url, json=cuerpo)
+        resp.raise_for_status()
+
+    def cerrar(self):
+        self._cliente.close()
+
+
+# ==============================================================================
+# 🛠️ CLI: trazas más lentas con su cascada de spans
+# ==============================================================================
+
+def leer_trazas(ruta: str):
+    for archivo in (ruta + ".1", ruta):
+        if not os.path.exists(archivo):
+            continue
+        with open(archivo, encoding="utf-8") as f:
+            for linea in f:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    yield json.loads(linea)
+                except ValueError:
+                    continue
+
+
+def cascada(traza: dict, ancho: int = 40) -> list:
+    """Líneas de texto con cada span indentado bajo su padre y una barra en su ventana de tiempo."""
+    spans = traza["spans"]
+    hijos = {}
+    for s in spans:
+        hijos.setdefault(s["padre"], []).append(s)
+    inicio = traza["inicio_ns"]
+    total = max(traza["dur_ms"], 0.001)
+
+    lineas = []
+
+    def pintar(span, nivel):
+        offset = (span["inicio_ns"] - inicio) / 1e6
+        desde = max(0, min(ancho - 1, int(offset / total * ancho)))
+        largo = max(1, int(span["dur_ms"] / total * ancho))
+        barra = " " * desde + "█" * min(largo, ancho - desde)
+        nombre = ("  " * nivel + span["nombre"])[:44]
+        marca = " ❌" if span.get("error") else ""
+        lineas.append(f"  {nombre:<44} {offset:>9.1f} ms |{barra:<{ancho}}| {span['dur_ms']:>9.1f} ms{marca}")
+        for hijo in sorted(hijos.get(span["span_id"], []), key=lambda s: s["inicio_ns"]):
+            pintar(hijo, nivel + 1)
+
+    for raiz in hijos.get(None, []):
+        pintar(raiz, 0)
+    return lineas
+
+
+def imprimir_traza(traza: dict, ancho: int = 40):
+    cuando = datetime.fromtimestamp(traza["inicio_ns"] / 1e9).strftime("%Y-%m-%d %H:%M:%S")
+    atributos = " ".join(f"{k}={v}" for k, v in traza.get("atributos", {}).items())
+    marca = f"  ❌ {traza['error']}" if traza.get("error") else ""
+    print(f"\n🐢 {traza['dur_ms']:.0f} ms  {traza['nombre']}  {atributos}  {cuando}  trace={traza['trace_id']}{marca}")
+    for linea in cascada(traza, ancho):
+        print(linea)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta de trazas exportadas a JSONL")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    lentas = sub.add_parser("lentas", help="las N trazas más lentas con su cascada de spans")
+    lentas.add_argument("archivo", nargs="?", default=os.getenv("TRAZAS_PATH", "trazas.jsonl"))
+    lentas.add_argument("--top", type=int, default=10)
+    lentas.add_argument("--min-ms", type=float, default=0.0)
+    lentas.add_argument("--nombre", help="sólo trazas cuyo nombre o atributos contengan este texto")
+    lentas.add_argument("--ancho", type=int, default=40)
+    ver = sub.add_parser("ver", help="una traza por trace_id")
+    ver.add_argument("archivo")
+    ver.add_argument("trace_id")
+    ver.add_argument("--ancho", type=int, default=40)
+    args = parser.parse_args(argv)
+
+    if args.comando == "ver":
+        for traza in leer_trazas(args.archivo):
+            if traza["trace_id"].startswith(args.trace_id):
+                imprimir_traza(traza, args.ancho)
+                return 0
+        print(f"No encontré la traza {args.trace_id}")
+        return 1
+
+    def coincide(traza):
+        if traza["dur_ms"] < args.min_ms:
+            return False
+        return not args.nombre or args.nombre in traza["nombre"] or args.nombre in json.dumps(traza["atributos"])
+
+    peores = heapq.nlargest(args.top, (t for t in leer_trazas(args.archivo) if coincide(t)),
+                            key=lambda t: t["dur_ms"])
+    if not peores:
+        print("Sin trazas.")
+        return 0
+    for traza in peores:
+        imprimir_traza(traza, args.ancho)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import time
+import logging
+import itertools
+from array import array
+
+from zonas import distancia_haversine_m
+
+logger = logging.getLogger(__name__)
+
+
+# ==============================================================================
+# 📡 INGESTA DE UBICACIÓN EN TIEMPO REAL (edited_message de Telegram)
+# ==============================================================================
+
+def codificar_polyline(puntos) -> str:
+    """Codifica [(lat, lon), ...] con el algoritmo de polyline de Google (precisión 1e-5)."""
+    salida = []
+    prev_lat = prev_lon = 0
+    for lat, lon in puntos:
+        ilat, ilon = int(round(lat * 1e5)), int(round(lon * 1e5))
+        for delta in (ilat - prev_lat, ilon - prev_lon):
+            valor = ~(delta << 1) if delta < 0 else (delta << 1)
+            while valor >= 0x20:
+                salida.append(chr((0x20 | (valor & 0x1F)) + 63))
+                valor >>= 5
+            salida.append(chr(valor + 63))
+        prev_lat, prev_lon = ilat, ilon
+    return "".join(salida)
+
+
+class RecorridoSesion:
+    """Trayecto de una jornada guardado en arrays compactos (8 bytes por valor)."""
+
+    __slots__ = ("lats", "lons", "tiempos", "distancia_m", "pendiente_volcado", "version")
+
+    def __init__(self):
+        self.lats = array("d")
+        self.lons = array("d")
+        self.tiempos = array("q")
+        self.distancia_m = 0.0
+        self.pendiente_volcado = False
+        self.version = 0
+
+    def __len__(self):
+        return len(self.lats)
+
+    def agregar(self, lat: float, lon: float, ts: int):
+        if len(self.lats):
+            self.distancia_m += distancia_haversine_m(self.lats[-1], self.lons[-1], lat, lon)
+        self.lats.append(lat)
+        self.lons.append(lon)
+        self.tiempos.append(ts)
+        self.pendiente_volcado = True
+
+    def muestreo(self, max_puntos: int) -> list:
+        """Submuestreo uniforme conservando siempre el primer y el último punto."""
+        n = len(self.lats)
+        if n <= max_puntos:
+            idx = range(n)
+        else:
+            paso = (n - 1) / (max_puntos - 1)
+            idx = sorted({int(round(i * paso)) for i in range(max_puntos)})
+        return [(self.lats[i], self.lons[i]) for i in idx]
+
+
+class IngestaUbicacionVivo:
+    """
+    Recibe las actualizaciones de ubicación en vivo por chat y descarta las redundantes:
+    sólo se guarda un punto si pasaron `intervalo_min_s` segundos y el técnico se movió
+    al menos `distancia_min_m` metros desde el último punto aceptado.
+    """
+
+    def __init__(self, distancia_min_m: float = 50, intervalo_min_s: int = 30,
+                 max_puntos_sesion: int = 5000, puntos_resumen: int = 50):
+        self.distancia_min_m = distancia_min_m
+        self.intervalo_min_s = intervalo_min_s
+        self.max_puntos_sesion = max_puntos_sesion
+        self.puntos_resumen = puntos_resumen
+        self.sesiones = {}
+        self.recibidas = self.aceptadas = 0
+        # Única para toda la ingesta: una sesión cerrada y reabierta no repite versiones
+        self._versiones = itertools.count(1)
+
+    def registrar(self, chat_id: int, lat: float, lon: float, ts: int | None = None,
+                  forzar: bool = False) -> bool:
+        """
+        Devuelve True si el punto se guardó en el recorrido.
+        `forzar` omite el filtro (puntos de inicio y salida de jornada).
+        """
+        self.recibidas += 1
+        ts = int(ts if ts is not None else time.time())
+        rec = self.sesiones.get(chat_id)
+        if rec is None:
+            rec = self.sesiones[chat_id] = RecorridoSesion()
+
+        if len(rec) and not forzar:
+            if ts - rec.tiempos[-1] < self.intervalo_min_s:
+                return False
+            if distancia_haversine_m(rec.lats[-1], rec.lons[-1], lat, lon) < self.distancia_min_m:
+                return False
+            if len(rec) >= self.max_puntos_sesion:
+                return False
+
+        rec.agregar(lat, lon, ts)
+        rec.version = next(self._versiones)
+        self.aceptadas += 1
+        return True
+
+    def resumen(self, chat_id: int) -> dict | None:
+        """{"puntos", "km", "ruta"} del recorrido, con la ruta submuestreada como polyline."""
+        rec = self.sesiones.get(chat_id)
+        if not rec or not len(rec):
+            return None
+        return {
+            "puntos": len(rec),
+            "km": round(rec.distancia_m / 1000, 2),
+            "ruta": codificar_polyline(rec.muestreo(self.puntos_resumen)),
+        }
+
+    def pendientes_de_volcado(self) -> list:
+        return [chat_id for chat_id, rec in self.sesiones.items() if rec.pendiente_volcado]
+
+    def version(self, chat_id: int) -> int | None:
+        """Versión del recorrido; se toma junto con las celdas a volcar y se pasa a `marcar_volcado`."""
+        rec = self.sesiones.get(chat_id)
+        return rec.version if rec else None
+
+    def marcar_volcado(self, chat_id: int, version: int):
+        """
+        Marca el recorrido como escrito si sigue en `version`. Si entró un punto
+        mientras se escribía, queda pendiente para el próximo volcado.
+        """
+        rec = self.sesiones.get(chat_id)
+        if rec and rec.version == version:
+            rec.pendiente_volcado = False
+
+    def cerrar(self, chat_id: int):
+        self.sesiones.pop(chat_id, None)
+
+    def limpiar(self):
+        self.sesiones.clear()
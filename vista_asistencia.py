@@ -0,0 +1,242 @@
+"""
+Vista en memoria de la asistencia del día para consultas de supervisores.
+
+Se alimenta de los propios handlers: después de cada update, main.py pasa la
+sesión del chat (`user_data[chat_id]`) a `registrar()`, que sólo reindexa si
+algo cambió. Los índices por zona, proveedor, tipo y paso permiten responder
+`/resumen`, `/pendientes ZONA` y GET /asistencia sin leer Sheets.
+
+Para saber quién *falta*, la vista guarda además el padrón de CUADRILLAS
+ACTIVAS (se carga al arrancar y después de la limpieza de medianoche).
+"""
+import time
+import threading
+from html import escape
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from zonas import normalizar_nombre_zona
+
+DIMENSIONES = ("zona", "proveedor", "tipo", "paso")
+CAMPOS = ("id_phoenix", "cuadrilla", "proveedor", "zona", "tipo", "paso", "hora_ingreso", "hora_salida")
+
+SIN_INGRESO, EN_REGISTRO, EN_JORNADA, FINALIZADO = "sin_ingreso", "en_registro", "en_jornada", "finalizado"
+ESTADOS = (EN_REGISTRO, EN_JORNADA, FINALIZADO)
+
+
+def estado_de(registro: dict) -> str:
+    if registro.get("hora_salida") or registro.get("paso") == "finalizado":
+        return FINALIZADO
+    if registro.get("hora_ingreso"):
+        return EN_JORNADA
+    return EN_REGISTRO
+
+
+def _clave(dimension: str, valor) -> str:
+    if dimension == "zona":
+        return normalizar_nombre_zona(valor)
+    if dimension == "paso":
+        return str(valor or "")
+    return str(valor or "").strip().upper()
+
+
+class VistaAsistencia:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._padron = {}                     # id_phoenix -> {"id_phoenix", "cuadrilla", "proveedor", "zona"}
+        self._padron_por_zona = defaultdict(set)
+        self.padron_cargado = None
+        self.eventos = 0
+        self.reiniciar()
+
+    # ---------- eventos ----------
+
+    def reiniciar(self):
+        """Día nuevo: se vacían los registros (el padrón se conserva hasta recargarlo)."""
+        with self._lock:
+            self._registros = {}              # chat_id -> registro
+            self._indices = {d: defaultdict(set) for d in DIMENSIONES}
+            self._por_phoenix = {}            # id_phoenix -> chat_id
+            self._nombres = {d: {} for d in DIMENSIONES}  # clave normalizada -> nombre como llegó
+            self.actualizado = None
+
+    def registrar(self, chat_id: int, sesion: dict | None) -> bool:
+        """Aplica el estado actual de la sesión del chat. Devuelve True si cambió algo."""
+        nuevo = {c: (sesion or {}).get(c) for c in CAMPOS} if sesion else None
+        with self._lock:
+            actual = self._registros.get(chat_id)
+            if actual is not None and nuevo is not None and all(actual[c] == nuevo[c] for c in CAMPOS):
+                return False
+            if actual is None and nuevo is None:
+                return False
+            if actual is not None:
+                self._desindexar(chat_id, actual)
+            if nuevo is not None:
+                nuevo["chat_id"] = chat_id
+                nuevo["actualizado"] = datetime.now().isoformat(timespec="seconds")
+                self._registros[chat_id] = nuevo
+                self._indexar(chat_id, nuevo)
+            else:
+                self._registros.pop(chat_id, None)
+            self.eventos += 1
+            self.actualizado = time.time()
+        return True
+
+    def _indexar(self, chat_id: int, registro: dict):
+        for d in DIMENSIONES:
+            if registro.get(d):
+                clave = _clave(d, registro[d])
+                self._indices[d][clave].add(chat_id)
+                self._nombres[d].setdefault(clave, str(registro[d]).strip())
+        if registro.get("id_phoenix"):
+            self._por_phoenix[str(registro["id_phoenix"]).strip()] = chat_id
+
+    def _desindexar(self, chat_id: int, registro: dict):
+        for d in DIMENSIONES:
+            if registro.get(d):
+                clave = _clave(d, registro[d])
+                grupo = self._indices[d].get(clave)
+                if grupo is not None:
+                    grupo.discard(chat_id)
+                    if not grupo:
+                        del self._indices[d][clave]
+        id_phoenix = str(registro.get("id_phoenix") or "").strip()
+        if id_phoenix and self._por_phoenix.get(id_phoenix) == chat_id:
+            del self._por_phoenix[id_phoenix]
+
+    def cargar_padron(self, cuadrillas: list):
+        """Reemplaza el padrón: [{"id_phoenix", "cuadrilla", "proveedor", "zona"}]."""
+        padron, por_zona = {}, defaultdict(set)
+        for c in cuadrillas:
+            id_phoenix = str(c.get("id_phoenix") or "").strip()
+            if not id_phoenix:
+                continue
+            padron[id_phoenix] = dict(c, id_phoenix=id_phoenix)
+            por_zona[normalizar_nombre_zona(c.get("zona"))].add(id_phoenix)
+        with self._lock:
+            self._padron, self._padron_por_zona = padron, por_zona
+            self.padron_cargado = datetime.now().isoformat(timespec="seconds")
+
+    # ---------- consultas ----------
+
+    def consultar(self, **filtros) -> list:
+        """Registros que cumplen todos los filtros por dimensión (zona=, proveedor=, tipo=, paso=)."""
+        with self._lock:
+            ids = None
+            for d, valor in filtros.items():
+                if d not in DIMENSIONES:
+                    raise ValueError(f"Dimensión desconocida: {d}")
+                if valor in (None, ""):
+                    continue
+                grupo = self._indices[d].get(_clave(d, valor), set())
+                ids = set(grupo) if ids is None else ids & grupo
+            ids = self._registros.keys() if ids is None else ids
+            return sorted((dict(self._registros[i]) for i in ids), key=lambda r: str(r.get("cuadrilla") or ""))
+
+    def pendientes(self, zona: str = None) -> list:
+        """Cuadrillas del padrón (de `zona`, o de todas) que todavía no marcaron ingreso."""
+        with self._lock:
+            if zona:
+                ids = self._padron_por_zona.get(normalizar_nombre_zona(zona), set())
+            else:
+                ids = self._padron.keys()
+            faltan = []
+            for id_phoenix in ids:
+                chat_id = self._por_phoenix.get(id_phoenix)
+                registro = self._registros.get(chat_id) if chat_id is not None else None
+                if registro is None or not registro.get("hora_ingreso"):
+                    faltan.append(dict(self._padron[id_phoenix],
+                                       estado=SIN_INGRESO if registro is None else EN_REGISTRO))
+        return sorted(faltan, key=lambda c: (str(c.get("zona") or ""), str(c.get("cuadrilla") or "")))
+
+    def _por_dimension(self, d: str) -> dict:
+        salida = {}
+        for clave, ids in self._indices[d].items():
+            conteo = Counter(estado_de(self._registros[i]) for i in ids)
+            salida[self._nombres[d].get(clave, clave)] = {e: conteo.get(e, 0) for e in ESTADOS}
+        return dict(sorted(salida.items()))
+
+    def resumen(self) -> dict:
+        with self._lock:
+            por_zona = self._por_dimension("zona")
+            # Esperadas / pendientes por zona según el padrón
+            nombres_zona = self._nombres["zona"]
+            for clave, ids in self._padron_por_zona.items():
+                nombre = nombres_zona.get(clave) or next(
+                    (self._padron[i].get("zona") for i in ids if self._padron[i].get("zona")), clave)
+                fila = por_zona.setdefault(nombre, {e: 0 for e in ESTADOS})
+                fila["esperadas"] = len(ids)
+                fila["pendientes"] = sum(
+                    1 for i in ids
+                    if not (self._registros.get(self._por_phoenix.get(i)) or {}).get("hora_ingreso")
+                )
+            conteo = Counter(estado_de(r) for r in self._registros.values())
+            return {
+                "registros": len(self._registros),
+                "por_estado": {e: conteo.get(e, 0) for e in ESTADOS},
+                "padron": len(self._padron),
+                "padron_cargado": self.padron_cargado,
+                "por_zona": dict(sorted(por_zona.items())),
+                "por_proveedor": self._por_dimension("proveedor"),
+                "por_tipo": self._por_dimension("tipo"),
+                "por_paso": {self._nombres["paso"].get(k, k): len(v) for k, v in sorted(self._indices["paso"].items())},
+                "eventos": self.eventos,
+            }
+
+    # ---------- GET /asistencia (aiohttp) ----------
+
+    async def manejar_http(self, request):
+        """
+        GET /asistencia                      -> resumen()
+        GET /asistencia?pendientes=1&zona=X  -> pendientes(X)
+        GET /asistencia?zona=X&tipo=Y...     -> consultar(...)
+        """
+        from aiohttp import web
+
+        q = request.query
+        t0 = time.perf_counter()
+        if q.get("pendientes"):
+            datos = {"pendientes": self.pendientes(q.get("zona"))}
+        elif any(q.get(d) for d in DIMENSIONES):
+            datos = {"registros": self.consultar(**{d: q.get(d) for d in DIMENSIONES})}
+        else:
+            datos = self.resumen()
+        datos["ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        return web.json_response(datos)
+
+
+# ==============================================================================
+# 💬 TEXTOS PARA TELEGRAM (HTML)
+# ==============================================================================
+
+def texto_resumen(resumen: dict) -> str:
+    e = resumen["por_estado"]
+    lineas = [
+        "📋 <b>Asistencia de hoy</b>",
+        f"✅ En jornada: <b>{e[EN_JORNADA]}</b> · 🏁 Finalizadas: <b>{e[FINALIZADO]}</b> · "
+        f"⏳ Registrando: <b>{e[EN_REGISTRO]}</b>",
+    ]
+    if resumen["padron"]:
+        pendientes = sum(z.get("pendientes", 0) for z in resumen["por_zona"].values())
+        lineas.append(f"❗ Sin ingreso: <b>{pendientes}</b> de {resumen['padron']} cuadrillas activas")
+    lineas.append("")
+    for zona, z in resumen["por_zona"].items():
+        ingresaron = z[EN_JORNADA] + z[FINALIZADO]
+        esperadas = f"/{z['esperadas']}" if "esperadas" in z else ""
+        lineas.append(f"📍 <b>{escape(zona)}</b>: {ingresaron}{esperadas} ingresaron, {z[FINALIZADO]} finalizaron")
+    return "\n".join(lineas)
+
+
+def texto_pendientes(zona: str | None, pendientes: list, limite: int = 60) -> str:
+    titulo = f"en <b>{escape(zona)}</b>" if zona else "en todas las zonas"
+    if not pendientes:
+        return f"🎉 No hay cuadrillas pendientes de ingreso {titulo}."
+    lineas = [f"❗ <b>{len(pendientes)}</b> cuadrillas sin ingreso {titulo}:", ""]
+    for c in pendientes[:limite]:
+        marca = " (registrando)" if c["estado"] == EN_REGISTRO else ""
+        lugar = "" if zona else f" · {escape(str(c.get('zona') or ''))}"
+        nombre = escape(str(c.get("cuadrilla") or c["id_phoenix"]))
+        lineas.append(f"• {nombre} — {escape(str(c.get('proveedor') or ''))}{lugar}{marca}")
+    if len(pendientes) > limite:
+        lineas.append(f"… y {len(pendientes) - limite} más")
+    return "\n".join(lineas)
@@ -0,0 +1,168 @@
+"""
+Modo webhook con servidor HTTP embebido (aiohttp).
+
+- POST {ruta}   → recibe updates de Telegram (verifica X-Telegram-Bot-Api-Secret-Token);
+                 con varios bots, una ruta por bot en el mismo puerto
+- GET  /health  → estado del bot para el health check de Render
+- GET  /metrics → métricas en formato Prometheus (si se pasa `metricas`)
+
+Prueba local con un update grabado:
+    python webhook.py enviar update.json --url http://localhost:8080/telegram --secret <WEBHOOK_SECRET>
+"""
+import sys
+import json
+import hmac
+import logging
+import argparse
+
+from aiohttp import web
+from telegram import Update
+
+from ciclo_vida import esperar_senal_apagado
+
+logger = logging.getLogger(__name__)
+
+CABECERA_SECRET = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def crear_app_web(apps, secret: str, ruta: str = "/telegram", estado_extra=None,
+                  metricas=None) -> web.Application:
+    """
+    App aiohttp que encola cada update recibido en el `update_queue` de su Application.
+    `apps` es una Application (atendida en `ruta`) o un dict {ruta: Application}.
+    `estado_extra` (opcional) es una función que devuelve un dict para /health.
+    `metricas` (opcional) es el handler aiohttp de GET /metrics.
+    """
+    apps = apps if isinstance(apps, dict) else {ruta: apps}
+
+    def receptor(app):
+        async def recibir_update(request: web.Request) -> web.Response:
+            recibido = request.headers.get(CABECERA_SECRET, "")
+            if not secret or not hmac.compare_digest(recibido, secret):
+                logger.warning(f"[WEBHOOK] Petición rechazada: secret inválido desde {request.remote}")
+                return web.Response(status=403)
+
+            try:
+                data = await request.json()
+                update = Update.de_json(data, app.bot)
+            except Exception as e:
+                logger.warning(f"[WEBHOOK] Update inválido: {e}")
+                return web.Response(status=400)
+
+            await app.update_queue.put(update)
+            return web.Response(status=200)
+        return recibir_update
+
+    async def salud(request: web.Request) -> web.Response:
+        activas = all(app.running for app in apps.values())
+        estado = {
+            "status": "ok" if activas else "iniciando",
+            "cola_updates": sum(app.update_queue.qsize() for app in apps.values()),
+        }
+        if estado_extra:
+            try:
+                estado.update(estado_extra())
+            except Exception as e:
+                estado["error_estado"] = str(e)
+        return web.json_response(estado, status=200 if activas else 503)
+
+    web_app = web.Application()
+    for ruta_bot, app in apps.items():
+        web_app.router.add_post(ruta_bot, receptor(app))
+    web_app.router.add_get("/health", salud)
+    if metricas:
+        web_app.router.add_get("/metrics", metricas)
+    return web_app
+
+
+async def ejecutar_webhook(apps, url_publica: str, secret: str, puerto: int,
+                           ruta: str = "/telegram", al_iniciar=None, al_apagar=None,
+                           estado_extra=None, allowed_updates=None, ciclo=None, al_detener=None,
+                           metricas=None, descartar_pendientes=False):
+    """
+    Inicializa las Applications de PTB, registra el webhook de cada una en
+    Telegram y atiende el servidor HTTP hasta recibir SIGTERM/SIGINT.
+    `apps` es una Application (en `ruta`) o un dict {ruta: Application};
+    `al_iniciar`, `al_detener` y `al_apagar` se llaman con cada una.
+
+    Al apagar, primero se cierra el servidor (Telegram reintenta los updates que
+    no entregamos) y luego se drena el trabajo en curso con `ciclo.apagar()`.
+    Los updates que Telegram acumuló mientras tanto se procesan al volver, salvo
+    con `descartar_pendientes=True` (para acotarlos por antigüedad, ver
+    `ciclo_vida.descartar_updates_viejos`).
+    """
+    apps = apps if isinstance(apps, dict) else {ruta: apps}
+    web_app = crear_app_web(apps, secret, ruta, estado_extra, metricas)
+    runner = web.AppRunner(web_app)
+
+    iniciadas = []
+    try:
+        for ruta_bot, app in apps.items():
+            await app.initialize()
+            iniciadas.append(app)
+            if al_iniciar:
+                await al_iniciar(app)
+
+            url = url_publica.rstrip("/") + ruta_bot
+            await app.bot.set_webhook(
+                url=url,
+                secret_token=secret,
+                allowed_updates=allowed_updates,
+                drop_pending_updates=descartar_pendientes,
+            )
+            logger.info(f"🌐 [WEBHOOK] Registrado en {url}")
+
+        for app in apps.values():
+            await app.start()
+        await runner.setup()
+        await web.TCPSite(runner, "0.0.0.0", puerto).start()
+        logger.info(f"🌐 [WEBHOOK] Escuchando en 0.0.0.0:{puerto} (health: /health, métricas: /metrics)")
+
+        await esperar_senal_apagado()
+        logger.info("🛑 [WEBHOOK] Señal de apagado recibida: dejo de recibir updates.")
+        await runner.cleanup()
+        if al_detener:
+            for app in apps.values():
+                await al_detener(app)
+        if ciclo:
+            await ciclo.apagar()
+    finally:
+        if runner.server is not None:
+            await runner.cleanup()
+        for app in iniciadas:
+            if app.running:
+                await app.stop()
+        for app in iniciadas:
+            if al_apagar:
+                await al_apagar(app)
+            await app.shutdown()
+
+
+# ==============================================================================
+# 🛠️ CLI: enviar un update grabado al webhook local
+# ==============================================================================
+
+def main(argv=None):
+    import httpx
+
+    parser = argparse.ArgumentParser(description="Herramientas del modo webhook")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    enviar = sub.add_parser("enviar", help="POST de un update JSON grabado al webhook")
+    enviar.add_argument("archivo", help="JSON con un update (o una lista de updates)")
+    enviar.add_argument("--url", default="http://localhost:8080/telegram")
+    enviar.add_argument("--secret", required=True)
+    args = parser.parse_args(argv)
+
+    with open(args.archivo, encoding="utf-8") as f:
+        data = json.load(f)
+    updates = data if isinstance(data, list) else [data]
+
+    with httpx.Client(timeout=10) as client:
+        for upd in updates:
+            resp = client.post(args.url, json=upd, headers={CABECERA_SECRET: args.secret})
+            print(f"update_id={upd.get('update_id')} -> HTTP {resp.status_code}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,480 @@
+import os
+import sys
+import json
+import math
+import struct
+import asyncio
+import hashlib
+import functools
+import argparse
+import re
+import logging
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# numpy y shapely se importan con el primer índice (ver _importar_shapely):
+# `import main` no paga ~150 ms por ellos si todavía no llegó ninguna ubicación.
+np = shapely = shape = Point = nearest_points = STRtree = None
+
+
+def _importar_shapely():
+    global np, shapely, shape, Point, nearest_points, STRtree
+    if shapely is not None:
+        return
+    import numpy
+    import shapely as _shapely
+    from shapely.geometry import shape as _shape, Point as _Point
+    from shapely.ops import nearest_points as _nearest_points
+    from shapely.strtree import STRtree as _STRtree
+    np, shapely, shape, Point, nearest_points, STRtree = (
+        numpy, _shapely, _shape, _Point, _nearest_points, _STRtree
+    )
+
+
+# ==============================================================================
+# 🌍 ÍNDICE ESPACIAL DE ZONAS (geometrías preparadas + STRtree)
+# ==============================================================================
+
+RADIO_TIERRA_M = 6371008.8
+
+
+def distancia_haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distancia en metros entre dos coordenadas (lat/lon en grados)."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * RADIO_TIERRA_M * math.asin(math.sqrt(a))
+
+
+def normalizar_nombre_zona(nombre) -> str:
+    """
+    Normaliza el nombre de zona para que coincidan Excel y GeoJSON:
+    mayúsculas, sin tildes, sin espacios repetidos y guiones sin espacios alrededor.
+    Ej: ' lima -  este 4 ' -> 'LIMA-ESTE 4'
+    """
+    return _normalizar_nombre_zona(str(nombre or ""))
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalizar_nombre_zona(texto: str) -> str:
+    # Los nombres de zona son pocos y se repiten en cada ubicación: unicodedata + regex
+    # costaba más que el propio punto-en-polígono.
+    texto = unicodedata.normalize("NFKD", texto)
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r"\s*-\s*", "-", texto.strip().upper())
+    return re.sub(r"\s+", " ", texto)
+
+
+class IndiceZonas:
+    """
+    Zonas cargadas en memoria listas para consultas rápidas.
+
+    - Cada polígono queda *preparado* (shapely.prepare), así las consultas
+      punto-en-polígono no vuelven a recorrer todos los vértices.
+    - `bounds` guarda las cajas (minx, miny, maxx, maxy) para descartar
+      puntos lejanos sin tocar la geometría.
+    - `arbol` es un STRtree sobre todas las zonas para consultas sin nombre.
+    - `exteriores` (opcional, viene de la caché binaria) son copias simplificadas
+      que *contienen* a cada zona: si el punto no está en la copia, no está en la zona.
+    """
+
+    def __init__(self, zonas: dict, exteriores=None, bounds=None):
+        _importar_shapely()
+        self.nombres = list(zonas.keys())
+        self.geometrias = np.array(
+            [shapely.force_2d(g) for g in zonas.values()], dtype=object
+        )
+        shapely.prepare(self.geometrias)
+        if bounds is not None:
+            self.bounds = np.asarray(bounds, dtype=float).reshape(-1, 4)
+        else:
+            self.bounds = shapely.bounds(self.geometrias) if len(self.nombres) else np.empty((0, 4))
+        # Las mismas cajas como floats de Python: en `contiene` (un punto) comparar
+        # escalares de numpy cuesta más que la comparación en sí
+        self._cajas = [tuple(map(float, caja)) for caja in self.bounds]
+        self.exteriores = None
+        if exteriores is not None:
+            self.exteriores = np.asarray(exteriores, dtype=object)
+            shapely.prepare(self.exteriores)
+        self.arbol = STRtree(self.geometrias)
+        self.por_nombre = {normalizar_nombre_zona(n): i for i, n in enumerate(self.nombres)}
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def indice(self, nombre_zona) -> int | None:
+        return self.por_nombre.get(normalizar_nombre_zona(nombre_zona))
+
+    def geometria(self, nombre_zona):
+        i = self.indice(nombre_zona)
+        return None if i is None else self.geometrias[i]
+
+    def como_dict(self) -> dict:
+        """Vista {nombre: polígono} compatible con el antiguo ZONAS_GEO."""
+        return dict(zip(self.nombres, self.geometrias))
+
+    def contiene(self, nombre_zona, lat: float, lon: float) -> bool | None:
+        """
+        True/False si el punto está dentro de la zona.
+        None si la zona no existe en el mapa.
+        """
+        i = self.indice(nombre_zona)
+        if i is None:
+            return None
+
+        minx, miny, maxx, maxy = self._cajas[i]
+        if not (minx <= lon <= maxx and miny <= lat <= maxy):
+            return False
+        if self.exteriores is not None and not shapely.contains_xy(self.exteriores[i], lon, lat):
+            return False
+        return bool(shapely.contains_xy(self.geometrias[i], lon, lat))
+
+    def contiene_xy(self, nombre_zona, lats, lons) -> "np.ndarray | None":
+        """Versión vectorizada de `contiene` para muchos puntos de una misma zona."""
+        i = self.indice(nombre_zona)
+        if i is None:
+            return None
+
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        minx, miny, maxx, maxy = self.bounds[i]
+        dentro = (lons >= minx) & (lons <= maxx) & (lats >= miny) & (lats <= maxy)
+        if self.exteriores is not None and dentro.any():
+            dentro[dentro] = shapely.contains_xy(self.exteriores[i], lons[dentro], lats[dentro])
+        if dentro.any():
+            dentro[dentro] = shapely.contains_xy(self.geometrias[i], lons[dentro], lats[dentro])
+        return dentro
+
+    def zonas_en_punto(self, lat: float, lon: float) -> list:
+        """Nombres de las zonas que contienen el punto (consulta por STRtree)."""
+        idx = self.arbol.query(Point(lon, lat), predicate="within")
+        return [self.nombres[i] for i in sorted(idx)]
+
+    def distancia_a_zona_m(self, nombre_zona, lat: float, lon: float) -> float | None:
+        """
+        Distancia en metros desde el punto hasta el borde de la zona.
+        0 si está dentro, None si la zona no existe.
+        """
+        i = self.indice(nombre_zona)
+        if i is None:
+            return None
+        if self.contiene(nombre_zona, lat, lon):
+            return 0.0
+
+        cercano, _ = nearest_points(self.geometrias[i], Point(lon, lat))
+        return distancia_haversine_m(lat, lon, cercano.y, cercano.x)
+
+    def consultar_punto(self, nombre_zona, lat: float, lon: float) -> dict:
+        """
+        Resumen para un marcado de asistencia:
+        {"dentro": bool | None, "zonas": [zonas que contienen el punto], "distancia_m": float | None}
+        """
+        zonas = self.zonas_en_punto(lat, lon)
+        i = self.indice(nombre_zona)
+        if i is None:
+            return {"dentro": None, "zonas": zonas, "distancia_m": None}
+
+        dentro = self.nombres[i] in zonas
+        return {
+            "dentro": dentro,
+            "zonas": zonas,
+            "distancia_m": 0.0 if dentro else self.distancia_a_zona_m(nombre_zona, lat, lon),
+        }
+
+
+def cargar_poligonos_geojson(ruta="zonas.geojson") -> dict:
+    """Carga el archivo GeoJSON y devuelve {NOMBRE_ZONA: polígono}."""
+    _importar_shapely()
+    with open(ruta, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    zonas_dict = {}
+    for feature in data.get('features', []):
+        # Obtenemos el nombre (ej: "SUR 1") y lo pasamos a mayúsculas
+        props = feature.get('properties', {})
+        nombre_zona = props.get('name', '').strip().upper()
+
+        if nombre_zona:
+            # Convierte la geometría del JSON a un Polígono matemático
+            zonas_dict[nombre_zona] = shape(feature['geometry'])
+    return zonas_dict
+
+
+# ==============================================================================
+# 📦 CACHÉ BINARIA DE ZONAS (WKB + copia simplificada + cajas)
+# ==============================================================================
+
+MAGIC_CACHE = b"ZONASBIN"
+VERSION_CACHE = 1
+# Tolerancia de simplificación (grados, ~5 m) y grilla de precisión (~0.1 m)
+TOLERANCIA_SIMPLIFICACION = 5e-5
+GRILLA_PRECISION = 1e-6
+
+
+def ruta_cache_por_defecto(ruta_geojson: str) -> str:
+    return os.path.splitext(ruta_geojson)[0] + ".bin"
+
+
+def checksum_archivo(ruta: str) -> bytes:
+    with open(ruta, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def exterior_simplificado(geom, tolerancia: float = TOLERANCIA_SIMPLIFICACION):
+    """
+    Copia liviana que contiene a la zona: se expande 2×tolerancia y luego se simplifica
+    con tolerancia (preservando topología), así nunca queda un punto de la zona afuera.
+    """
+    _importar_shapely()
+    exterior = shapely.simplify(shapely.buffer(geom, 2 * tolerancia), tolerancia, preserve_topology=True)
+    return shapely.set_precision(exterior, GRILLA_PRECISION)
+
+
+def compilar_cache_zonas(ruta_geojson="zonas.geojson", ruta_cache=None, zonas=None, checksum=None) -> str:
+    """
+    Compila el GeoJSON a la caché binaria y devuelve la ruta escrita. Si ya se
+    parseó, `zonas` y `checksum` evitan leer el archivo otra vez.
+    """
+    ruta_cache = ruta_cache or ruta_cache_por_defecto(ruta_geojson)
+    if checksum is None:
+        checksum = checksum_archivo(ruta_geojson)
+    if zonas is None:
+        zonas = cargar_poligonos_geojson(ruta_geojson)  # importa shapely
+
+    partes = [MAGIC_CACHE, struct.pack("<H", VERSION_CACHE), checksum, struct.pack("<I", len(zonas))]
+    for nombre, geom in zonas.items():
+        geom = shapely.force_2d(geom)
+        wkb = shapely.to_wkb(geom)
+        wkb_simple = shapely.to_wkb(exterior_simplificado(geom))
+        nombre_b = nombre.encode("utf-8")
+        normal_b = normalizar_nombre_zona(nombre).encode("utf-8")
+        partes += [
+            struct.pack("<HH", len(nombre_b), len(normal_b)), nombre_b, normal_b,
+            struct.pack("<4d", *shapely.bounds(geom)),
+            struct.pack("<II", len(wkb), len(wkb_simple)), wkb, wkb_simple,
+        ]
+
+    temporal = ruta_cache + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(b"".join(partes))
+    os.replace(temporal, ruta_cache)
+    return ruta_cache
+
+
+def cargar_cache_zonas(ruta_cache: str, checksum: bytes) -> IndiceZonas | None:
+    """
+    Carga la caché binaria si existe y corresponde al checksum del GeoJSON.
+    Devuelve None si falta, es de otra versión o está desactualizada.
+    """
+    try:
+        with open(ruta_cache, "rb") as f:
+            datos = memoryview(f.read())
+    except OSError:
+        return None
+
+    cabecera = len(MAGIC_CACHE)
+    if bytes(datos[:cabecera]) != MAGIC_CACHE:
+        return None
+    (version,) = struct.unpack_from("<H", datos, cabecera)
+    pos = cabecera + 2
+    if version != VERSION_CACHE or bytes(datos[pos:pos + 32]) != checksum:
+        return None
+    pos += 32
+
+    (cantidad,) = struct.unpack_from("<I", datos, pos)
+    pos += 4
+    nombres, bounds, wkbs, wkbs_simples = [], [], [], []
+    for _ in range(cantidad):
+        largo_nombre, largo_normal = struct.unpack_from("<HH", datos, pos)
+        pos += 4
+        nombres.append(bytes(datos[pos:pos + largo_nombre]).decode("utf-8"))
+        pos += largo_nombre + largo_normal
+        bounds.append(struct.unpack_from("<4d", datos, pos))
+        pos += 32
+        largo_wkb, largo_simple = struct.unpack_from("<II", datos, pos)
+        pos += 8
+        wkbs.append(bytes(datos[pos:pos + largo_wkb]))
+        pos += largo_wkb
+        wkbs_simples.append(bytes(datos[pos:pos + largo_simple]))
+        pos += largo_simple
+
+    _importar_shapely()
+    geometrias = shapely.from_wkb(wkbs) if wkbs else []
+    exteriores = shapely.from_wkb(wkbs_simples) if wkbs_simples else []
+    return IndiceZonas(dict(zip(nombres, geometrias)), exteriores=exteriores, bounds=bounds)
+
+
+def cargar_zonas(ruta="zonas.geojson", ruta_cache=None) -> IndiceZonas:
+    """
+    Construye el índice desde la caché binaria si está vigente; si no, parsea el
+    GeoJSON y regenera la caché. Lanza excepción si el GeoJSON no se puede leer.
+    """
+    ruta_cache = ruta_cache or ruta_cache_por_defecto(ruta)
+    checksum = checksum_archivo(ruta)
+
+    try:
+        indice = cargar_cache_zonas(ruta_cache, checksum)
+    except Exception as e:
+        logger.warning(f"[ZONAS] Caché binaria inválida ({ruta_cache}): {e}")
+        indice = None
+    if indice is not None:
+        return indice
+
+    zonas = cargar_poligonos_geojson(ruta)
+    indice = IndiceZonas(zonas)
+    try:
+        compilar_cache_zonas(ruta, ruta_cache, zonas=zonas, checksum=checksum)
+        logger.info(f"📦 Caché binaria de zonas regenerada en {ruta_cache}.")
+    except Exception as e:
+        logger.warning(f"[ZONAS] No se pudo escribir la caché binaria ({ruta_cache}): {e}")
+    return indice
+
+
+def cargar_indice_zonas(ruta="zonas.geojson") -> IndiceZonas:
+    """Carga el mapa (caché binaria o GeoJSON) y construye el índice. Si falla, devuelve un índice vacío."""
+    try:
+        indice = cargar_zonas(ruta)
+        logger.info(f"🗺️ Se cargaron {len(indice)} zonas correctamente desde {ruta}.")
+        return indice
+    except Exception as e:
+        logger.error(f"❌ Error cargando el mapa ({ruta}): {e}")
+        return IndiceZonas({})
+
+
+# ==============================================================================
+# 🔄 RECARGA EN CALIENTE DE zonas.geojson
+# ==============================================================================
+
+def diferencias_zonas(anterior: IndiceZonas, nuevo: IndiceZonas) -> dict:
+    """Zonas agregadas, eliminadas y modificadas (geometría distinta) entre dos índices."""
+    previas = dict(zip(anterior.nombres, anterior.geometrias))
+    actuales = dict(zip(nuevo.nombres, nuevo.geometrias))
+    return {
+        "agregadas": sorted(set(actuales) - set(previas)),
+        "eliminadas": sorted(set(previas) - set(actuales)),
+        "modificadas": sorted(
+            n for n in set(previas) & set(actuales)
+            if not shapely.equals_exact(previas[n], actuales[n], tolerance=0)
+        ),
+    }
+
+
+class GestorZonas:
+    """
+    Mantiene el índice de zonas vigente y lo recarga cuando cambia el archivo.
+
+    El índice nuevo se construye completo fuera del event loop y luego se
+    reemplaza con una sola asignación: quien lea `gestor.indice` obtiene
+    siempre un índice entero (el anterior o el nuevo), nunca uno a medias.
+    Si el archivo nuevo está mal formado, se conserva el índice anterior y no
+    se vuelve a intentar hasta que el archivo cambie otra vez.
+
+    El primer índice se carga recién en la primera lectura de `gestor.indice`
+    (o con `precargar()` desde el executor), no al construir el gestor.
+    """
+
+    def __init__(self, ruta="zonas.geojson"):
+        self.ruta = ruta
+        self._firma = None
+        self._firma_fallida = None  # versión del archivo que ya falló al recargar
+        self._indice = None
+        self._lock_carga = threading.Lock()
+        self._lock = asyncio.Lock()
+
+    @property
+    def cargado(self) -> bool:
+        return self._indice is not None
+
+    @property
+    def indice(self) -> IndiceZonas:
+        if self._indice is None:
+            with self._lock_carga:
+                if self._indice is None:
+                    self._firma = self._firma_archivo()
+                    self._indice = cargar_indice_zonas(self.ruta)
+        return self._indice
+
+    @indice.setter
+    def indice(self, nuevo: IndiceZonas):
+        self._indice = nuevo
+
+    def precargar(self) -> int:
+        """Carga el índice si todavía no se usó. Devuelve la cantidad de zonas."""
+        return len(self.indice)
+
+    def _firma_archivo(self):
+        try:
+            st = os.stat(self.ruta)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def cambio(self) -> bool:
+        firma = self._firma_archivo()
+        return firma != self._firma and firma != self._firma_fallida
+
+    def _cargar_y_comparar(self, anterior: IndiceZonas):
+        """En el executor: índice nuevo y su diff contra `anterior` (None si no tiene zonas)."""
+        nuevo = cargar_zonas(self.ruta)
+        return nuevo, diferencias_zonas(anterior, nuevo) if len(nuevo) else None
+
+    async def recargar_si_cambio(self) -> dict | None:
+        """Revisa el archivo y, si cambió, reconstruye y reemplaza el índice. Devuelve el diff."""
+        if not self.cargado or not self.cambio():
+            # Sin cargar todavía: la primera lectura ya tomará el archivo vigente
+            return None
+
+        async with self._lock:
+            firma = self._firma_archivo()
+            if firma in (self._firma, self._firma_fallida) or firma is None:
+                return None
+
+            loop = asyncio.get_running_loop()
+            try:
+                nuevo, diff = await loop.run_in_executor(
+                    None, self._cargar_y_comparar, self.indice
+                )
+            except Exception as e:
+                self._firma_fallida = firma
+                logger.error(f"❌ [ZONAS] No se pudo recargar {self.ruta}, se mantiene el mapa anterior: {e}")
+                return None
+
+            if len(nuevo) == 0:
+                self._firma_fallida = firma
+                logger.error(f"❌ [ZONAS] {self.ruta} no tiene zonas válidas, se mantiene el mapa anterior.")
+                return None
+
+            self.indice = nuevo
+            self._firma = firma
+            self._firma_fallida = None
+
+        logger.info(
+            f"🔄 [ZONAS] Mapa recargado: {len(nuevo)} zonas | "
+            f"Agregadas: {diff['agregadas'] or '-'} | Eliminadas: {diff['eliminadas'] or '-'} | "
+            f"Modificadas: {diff['modificadas'] or '-'}"
+        )
+        return diff
+
+
+# ==============================================================================
+# 🛠️ CLI: python zonas.py compilar [--geojson zonas.geojson] [--salida zonas.bin]
+# ==============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Herramientas de zonas")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    compilar = sub.add_parser("compilar", help="Compila el GeoJSON a la caché binaria")
+    compilar.add_argument("--geojson", default="zonas.geojson")
+    compilar.add_argument("--salida", default=None)
+    args = parser.parse_args(argv)
+
+    if args.comando == "compilar":
+        ruta = compilar_cache_zonas(args.geojson, args.salida)
+        print(f"📦 {args.geojson} -> {ruta} ({os.path.getsize(ruta)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())